@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+# 分片检查点的保存位置
+SHARD_DIR = 'result/shards'
+
+
+class ShardRunner:
+    """
+    分片批处理：把待处理的文件分成固定大小的分片，每处理完一个分片就把结果写入磁盘（检查点）。
+    中途崩溃后重新运行时跳过已完成的分片，从第一个未完成的分片继续；
+    全部完成后按原顺序读出所有分片的结果并合并
+    """
+
+    def __init__(self, name, items, shard_size, key=str, config=None, directory=SHARD_DIR):
+        """
+        参数：
+            name: 任务名（如'task1_1'），每个任务的检查点保存在单独的目录中
+            items: 待处理的项目列表（如PDF路径）
+            shard_size: 每个分片的项目数
+            key: 项目的标识函数，用于判断检查点是否属于同一批输入
+            config: 影响结果的其他参数（如解析方式），变化时已有的检查点作废
+        """
+        self.items = list(items)
+        self.shard_size = max(1, shard_size)
+        self.directory = Path(directory) / name
+        self.shards = [self.items[start:start + self.shard_size]
+                       for start in range(0, len(self.items), self.shard_size)]
+
+        digest = hashlib.sha256()
+        digest.update(json.dumps([self.shard_size, config], ensure_ascii=False).encode('utf-8'))
+        for item in self.items:
+            digest.update(key(item).encode('utf-8'))
+            digest.update(b'\0')
+        self.plan = {'digest': digest.hexdigest(), 'shards': len(self.shards)}
+
+        # 输入或参数变化时，之前的检查点不能再用
+        plan_path = self.directory / 'plan.json'
+        if plan_path.exists():
+            with open(plan_path, 'r', encoding='utf-8') as f:
+                if json.load(f) != self.plan:
+                    print(f"输入或参数已变化，删除旧的分片检查点: {self.directory}")
+                    shutil.rmtree(self.directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(plan_path, 'w', encoding='utf-8') as f:
+            json.dump(self.plan, f)
+
+    def shard_path(self, index):
+        return self.directory / f"shard_{index:05d}.json"
+
+    def completed(self):
+        """
+        已完成的分片数
+        """
+        return sum(self.shard_path(index).exists() for index in range(len(self.shards)))
+
+    def run(self, process_shard):
+        """
+        依次处理未完成的分片
+        参数：
+            process_shard: 处理函数，参数为一个分片的项目列表，返回与之一一对应的结果列表（可JSON序列化）
+        """
+        done = self.completed()
+        if done:
+            print(f"从检查点继续：{done}/{len(self.shards)}个分片已完成")
+
+        for index, shard in enumerate(self.shards):
+            path = self.shard_path(index)
+            if path.exists():
+                continue
+
+            records = process_shard(shard)
+            if len(records) != len(shard):
+                raise ValueError(f"分片{index}的结果数{len(records)}与文件数{len(shard)}不一致")
+
+            # 先写临时文件再改名，崩溃时不会留下不完整的分片
+            temp_path = path.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(records, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+            print(f"分片 {index + 1}/{len(self.shards)} 已保存")
+
+    def records(self):
+        """
+        按原顺序逐个返回所有分片中的结果
+        """
+        for index in range(len(self.shards)):
+            with open(self.shard_path(index), 'r', encoding='utf-8') as f:
+                yield from json.load(f)
+
+    def clear(self):
+        """
+        结果合并保存后删除检查点
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
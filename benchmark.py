@@ -0,0 +1,382 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+# 营养成分表中的营养成分：(名称, 单位, 每100kJ的典型值)
+SYNTHETIC_NUTRIENTS = [
+    ('能量', 'kJ', 100), ('蛋白质', 'g', 0.94), ('脂肪', 'g', 0.9), ('亚油酸', 'g', 0.1),
+    ('α-亚麻酸', 'mg', 18.3), ('碳水化合物', 'g', 2.98), ('维生素A', 'μg RE', 21.5),
+    ('维生素D', 'μg', 0.42), ('维生素E', 'mg α-TE', 0.44), ('维生素K1', 'μg', 1.49),
+    ('维生素B1', 'mg', 0.05), ('维生素B2', 'mg', 0.05), ('维生素B6', 'mg', 0.03),
+    ('维生素B12', 'μg', 0.08), ('烟酸', 'mg', 0.17), ('叶酸', 'μg', 5.8), ('泛酸', 'mg', 0.13),
+    ('维生素C', 'mg', 3.1), ('生物素', 'μg', 0.7), ('钠', 'mg', 10), ('钾', 'mg', 24),
+    ('铜', 'μg', 11), ('镁', 'mg', 3.0), ('铁', 'mg', 0.33), ('锌', 'mg', 0.2), ('锰', 'μg', 8.9),
+    ('钙', 'mg', 25), ('磷', 'mg', 15.2), ('碘', 'μg', 2.5), ('氯', 'mg', 18), ('硒', 'μg', 0.9),
+    ('胆碱', 'mg', 6.3), ('肌醇', 'mg', 1.3), ('牛磺酸', 'mg', 2.1), ('左旋肉碱', 'mg', 0.58)
+]
+
+# 两种营养成分表格式（见task1_1.parse_nutrient_table）
+LAYOUTS = {
+    'per_ml': ['每100g', '每100mL', '每100kJ'],
+    'per_serving': ['每100g', '每100kJ', '每份']
+}
+
+CATEGORIES = ['全营养配方食品', '特定全营养配方食品', '非全营养配方食品', '蛋白质组件', '电解质配方']
+STATES = ['粉状', '液态', '半固态', '凝胶状']
+POPULATIONS = ['1～10岁进食受限、消化吸收障碍、代谢紊乱等需要补充营养的人群',
+               '10岁以上需要补充蛋白质的人群', '0～12月龄早产/低出生体重儿',
+               '18岁以上吞咽障碍的人群']
+FILLER = '本品为特殊医学用途配方食品，应在医生或临床营养师指导下使用，不适用于非目标人群。'
+
+# 页面排版参数（与实际注册文件接近：A4页面、10.5磅宋体、行距约23磅）
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+FONT_SIZE = 10.5
+LINE_HEIGHT = 23.4
+TOP_MARGIN = 780
+BOTTOM_MARGIN = 60
+LINE_CHARS = 38
+
+
+def pdf_string(text):
+    """
+    将文本编码为UniGB-UCS2-H编码的PDF十六进制字符串
+    """
+    return '<' + text.encode('utf-16-be').hex().upper() + '>'
+
+
+def write_pdf(pages):
+    """
+    生成只包含文本的PDF文件内容（使用PDF阅读器内置的STSong-Light中文字体，不需要嵌入字体文件）
+    参数：
+        pages: 每页的文本列表，每项为(x, y, 文本)，坐标原点在页面左下角
+    返回：
+        PDF文件的字节内容
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            ' '.join(f"{5 + 2 * i} 0 R" for i in range(len(pages))), len(pages))).encode(),
+        b"<< /Type /Font /Subtype /Type0 /BaseFont /STSong-Light /Encoding /UniGB-UCS2-H "
+        b"/DescendantFonts [4 0 R] >>",
+        b"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /STSong-Light "
+        b"/CIDSystemInfo << /Registry (Adobe) /Ordering (GB1) /Supplement 4 >> /DW 1000 /W [1 95 500] "
+        b"/FontDescriptor << /Type /FontDescriptor /FontName /STSong-Light /Flags 6 "
+        b"/FontBBox [-25 -254 1000 880] /ItalicAngle 0 /Ascent 880 /Descent -120 "
+        b"/CapHeight 880 /StemV 93 >> >>"
+    ]
+    for i, lines in enumerate(pages):
+        content = '\n'.join(f"BT /F1 {FONT_SIZE} Tf 1 0 0 1 {x} {y:.2f} Tm {pdf_string(text)} Tj ET"
+                            for x, y, text in lines).encode()
+        objects.append((f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                        f"/Resources << /Font << /F1 3 0 R >> >> /Contents {6 + 2 * i} 0 R >>").encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    output += b''.join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return output
+
+
+class PageWriter:
+    """
+    按行排版文本，写满一页后自动换页
+    """
+
+    def __init__(self):
+        self.pages = [[]]
+        self.y = TOP_MARGIN
+        self.on_new_page = None  # 换页时调用（如续表时重复表头）
+
+    def line(self, cells):
+        """
+        写一行，cells为[(x, 文本), ...]
+        """
+        if self.y < BOTTOM_MARGIN:
+            self.pages.append([])
+            self.y = TOP_MARGIN
+            if self.on_new_page is not None:
+                self.on_new_page()
+        self.pages[-1].extend((x, self.y, text) for x, text in cells)
+        self.y -= LINE_HEIGHT
+
+    def paragraph(self, text):
+        for start in range(0, len(text), LINE_CHARS):
+            self.line([(90, text[start:start + LINE_CHARS])])
+
+
+def make_document(reg_number, layout, min_pages, rng):
+    """
+    生成一份模拟的特医食品注册文件
+    参数：
+        reg_number: 注册证号
+        layout: 营养成分表格式，LAYOUTS中的键
+        min_pages: 最少页数，内容不够时在文件末尾追加附页
+        rng: 随机数生成器
+    返回：
+        (PDF字节内容, 期望的提取结果)
+    """
+    bases = LAYOUTS[layout]
+    energy = rng.uniform(300, 2000)
+    expected = {
+        '产品类别': rng.choice(CATEGORIES),
+        '组织状态': rng.choice(STATES),
+        '适用人群': rng.choice(POPULATIONS),
+        'nutrients': {}
+    }
+
+    writer = PageWriter()
+    writer.line([(270, f"{reg_number}产品说明书")])
+    writer.line([(90, f"【产品类别】{expected['产品类别']}")])
+    writer.paragraph('【配料表】' + '、'.join(rng.sample(
+        ['麦芽糊精', '乳清蛋白粉', '植物油', '中链甘油三酯', '酪蛋白酸钙', '白砂糖', '磷脂',
+         '柠檬酸钾', '氯化钠', '碳酸钙', '维生素A', '维生素D', '硫酸亚铁', '硫酸锌'], 10)) + '。')
+
+    # 营养成分表，跨页时重复表头
+    columns = [185 + 90 * i for i in range(len(bases))]
+
+    def header():
+        writer.line([(95, '营养成分')] + list(zip(columns, bases)))
+
+    writer.line([(90, '【营养成分表】')])
+    header()
+    writer.on_new_page = header
+    for name, unit, per_kj in SYNTHETIC_NUTRIENTS:
+        per_kj = round(per_kj * rng.uniform(0.5, 1.5), 2) if name != '能量' else 100
+        values = {'每100kJ': per_kj, '每100g': round(per_kj * energy / 100, 2),
+                  '每100mL': round(per_kj * energy / 400, 2), '每份': round(per_kj * energy / 300, 2)}
+        expected['nutrients'][f"{name}({unit})"] = per_kj
+        writer.line([(106, f"{name}({unit})")] +
+                    [(x, f"{values[base]:g}") for x, base in zip(columns, bases)])
+    writer.on_new_page = None
+    if layout == 'per_serving':
+        writer.line([(90, '备注：每份产品的量为30g。')])
+
+    writer.paragraph('【配方特点/营养学特征】' + FILLER)
+    writer.line([(90, f"【组织状态】{expected['组织状态']}")])
+    writer.line([(90, f"【适用人群】{expected['适用人群']}。")])
+    writer.paragraph('【食用方法和食用量】口服或管饲。' + FILLER)
+    writer.line([(90, '【净含量和规格】400g/罐')])
+    writer.line([(90, '【保质期】24个月')])
+    writer.line([(90, '【贮存条件】置于通风干燥处保存。')])
+    writer.paragraph('【警示说明和注意事项】' + FILLER)
+
+    while len(writer.pages) < min_pages:
+        writer.paragraph(FILLER)
+    return write_pdf(writer.pages), expected
+
+
+def generate_corpus(folder, count, min_pages=2, seed=0):
+    """
+    在folder中生成count份模拟注册文件，两种营养成分表格式交替出现
+    返回：
+        {PDF路径: 期望的提取结果}
+    """
+    rng = random.Random(seed)
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    corpus = {}
+    layouts = list(LAYOUTS)
+    for i in range(count):
+        reg_number = f"国食注字TY{20900000 + i}"
+        data, expected = make_document(reg_number, layouts[i % len(layouts)], min_pages, rng)
+        pdf_path = folder / f"{reg_number}.pdf"
+        pdf_path.write_bytes(data)
+        corpus[pdf_path] = expected
+    return corpus
+
+
+def summarize(latencies, wall_time):
+    """
+    每份文件耗时的统计：百分位数（毫秒）和吞吐量（份/秒）
+    """
+    latencies = np.array(latencies) * 1000
+    return {
+        'documents': len(latencies),
+        'mean_ms': round(float(latencies.mean()), 3),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p90_ms': round(float(np.percentile(latencies, 90)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'max_ms': round(float(latencies.max()), 3),
+        'throughput_per_s': round(len(latencies) / wall_time, 3) if wall_time else None
+    }
+
+
+def time_documents(pdf_files, extract, repeat):
+    """
+    依次对每份文件调用extract，重复repeat轮，返回(每次耗时列表, 总耗时, 最后一轮的结果)
+    """
+    latencies = []
+    results = {}
+    # 预热一次（模块内的查找表、字体映射等在第一次调用时初始化），不计入耗时
+    if pdf_files:
+        extract(pdf_files[0])
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for pdf_path in pdf_files:
+            t0 = time.perf_counter()
+            results[pdf_path] = extract(pdf_path)
+            latencies.append(time.perf_counter() - t0)
+    return latencies, time.perf_counter() - start, results
+
+
+def run_benchmark(count=50, min_pages=2, repeat=1, seed=0, table_modes=('text', 'coords'), keep=None,
+                  backends=('pdfplumber',), books=None):
+    """
+    生成模拟文件并测量extract_nutrition_data和extract_pdf_info的耗时
+    参数：
+        count: 模拟文件数量
+        min_pages: 每份文件的最少页数
+        repeat: 每份文件测量的轮数
+        seed: 随机种子，相同的参数和种子生成相同的文件
+        table_modes: 要测量的营养成分表解析方式（使用pdfplumber后端）
+        keep: 保存模拟文件的目录，为None时使用临时目录并在结束后删除
+        backends: 要比较的PDF解析后端（见pdf_text.BACKENDS），extract_pdf_info用每个后端各测量一次，
+                  pdfplumber以外的后端也测量extract_nutrition_data的'text'方式
+        books: 真实PDF所在的目录（如DATA/books），提供时不生成模拟文件，
+               正确数改为与pdfplumber后端结果一致的文件数
+    返回：
+        可JSON序列化的测量结果
+    """
+    import task1_1
+    import task1_2
+
+    workdir = Path(keep) if keep else Path(tempfile.mkdtemp(prefix='benchmark_'))
+    cwd = os.getcwd()
+    try:
+        if books:
+            corpus = None
+            pdf_files = sorted(Path(books).resolve().glob('*.pdf'))
+            count = len(pdf_files)
+        else:
+            corpus = generate_corpus(workdir / 'books', count, min_pages, seed)
+            pdf_files = list(corpus)
+
+        # extract_pdf_info会写result/info.txt，在工作目录中运行，不影响真实结果
+        os.chdir(workdir)
+        Path('result').mkdir(exist_ok=True)
+
+        report = {
+            'config': {'count': count, 'min_pages': min_pages, 'repeat': repeat, 'seed': seed,
+                       'books': str(books) if books else None},
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count()
+            },
+            'corpus_bytes': sum(pdf_path.stat().st_size for pdf_path in pdf_files),
+            'results': {}
+        }
+
+        # (结果名称, 函数, 营养成分表解析方式, 后端)，pdfplumber后端的名称与之前的结果保持一致便于对比
+        jobs = [(f"extract_nutrition_data[{mode}]", 'nutrition', mode, 'pdfplumber') for mode in table_modes]
+        jobs += [(f"extract_nutrition_data[text,{backend}]", 'nutrition', 'text', backend)
+                 for backend in backends if backend != 'pdfplumber']
+        jobs += [('extract_pdf_info' if backend == 'pdfplumber' else f"extract_pdf_info[{backend}]",
+                  'label', None, backend) for backend in backends]
+
+        # 真实文件没有标准答案，以pdfplumber后端（营养成分表为text方式）的结果为参照
+        references = {}
+        for name, kind, mode, backend in jobs:
+            if kind == 'nutrition':
+                def extract(pdf_path):
+                    result = task1_1.extract_nutrition_data(pdf_path, table_mode=mode, backend=backend)
+                    result.pop(task1_1.TABLE_KEY, None)
+                    return result
+            else:
+                def extract(pdf_path):
+                    return task1_2.extract_pdf_info(pdf_path, backend=backend)
+
+            latencies, wall, results = time_documents(pdf_files, extract, repeat)
+            stats = summarize(latencies, wall)
+            if corpus is None:
+                if backend == 'pdfplumber' and mode in ('text', None):
+                    references[kind] = results
+                reference = references.get(kind)
+                stats['correct'] = (sum(results[pdf_path] == reference[pdf_path] for pdf_path in pdf_files)
+                                    if reference is not None else None)
+            elif kind == 'nutrition':
+                stats['correct'] = sum(
+                    all(results[pdf_path].get(key) == value
+                        for key, value in expected['nutrients'].items() if key in results[pdf_path])
+                    for pdf_path, expected in corpus.items())
+            else:
+                stats['correct'] = sum(
+                    all(results[pdf_path][key] == expected[key] for key in ('产品类别', '组织状态', '适用人群'))
+                    for pdf_path, expected in corpus.items())
+            report['results'][name] = stats
+        return report
+    finally:
+        os.chdir(cwd)
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def print_report(report, baseline=None):
+    """
+    打印测量结果，提供baseline时同时打印与其相比的变化
+    """
+    config = report['config']
+    if config.get('books'):
+        print(f"{config['books']}中的文件: {config['count']}份，"
+              f"共{report['corpus_bytes']}字节，重复{config['repeat']}轮")
+    else:
+        print(f"模拟文件: {config['count']}份，每份至少{config['min_pages']}页，"
+              f"共{report['corpus_bytes']}字节，重复{config['repeat']}轮")
+    for name, stats in report['results'].items():
+        line = (f"{name}: p50 {stats['p50_ms']:.1f}ms, p90 {stats['p90_ms']:.1f}ms, "
+                f"p99 {stats['p99_ms']:.1f}ms, 吞吐量 {stats['throughput_per_s']:.1f}份/秒")
+        if stats['correct'] is not None:
+            line += (f", {'与pdfplumber一致' if config.get('books') else '正确'} "
+                     f"{stats['correct']}/{config['count']}")
+        if baseline is not None and name in baseline.get('results', {}):
+            old = baseline['results'][name]
+            change = (stats['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0
+            line += f"（p50较基准{change:+.1f}%）"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='用模拟的注册文件测量task1_1、task1_2的提取速度')
+    parser.add_argument('--count', type=int, default=50, help='模拟文件数量（默认50）')
+    parser.add_argument('--pages', type=int, default=2, help='每份文件的最少页数（默认2）')
+    parser.add_argument('--repeat', type=int, default=1, help='每份文件测量的轮数（默认1）')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子（默认0）')
+    parser.add_argument('--table-mode', choices=['text', 'coords'], action='append',
+                        help='只测量指定的营养成分表解析方式（可重复指定，默认全部）')
+    parser.add_argument('--backend', choices=['pdfplumber', 'pdfium'], action='append',
+                        help='要比较的PDF解析后端（可重复指定，默认只测量pdfplumber）')
+    parser.add_argument('--books', default=None,
+                        help='测量该目录中的真实PDF（如DATA/books）而不是模拟文件，以pdfplumber的结果为参照')
+    parser.add_argument('--keep', default=None, help='把模拟文件保存到该目录')
+    parser.add_argument('--output', default='result/benchmark.json', help='结果JSON文件路径')
+    parser.add_argument('--compare', default=None, help='与之前保存的结果JSON对比')
+    args = parser.parse_args()
+
+    report = run_benchmark(args.count, args.pages, args.repeat, args.seed,
+                           tuple(args.table_mode or ('text', 'coords')), args.keep,
+                           tuple(args.backend or ('pdfplumber',)), args.books)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    print(f"\n结果已保存到: {args.output}")
@@ -0,0 +1,141 @@
+import argparse
+import importlib
+import io
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+
+# 各图表：模块、函数、使用的数据（result1或result2）、生成的文件和需要的库。
+# 本模块只在顶层导入标准库，cli.py读取这里的图表列表时不会加载pandas
+CHARTS = {
+    'trends': {'module': 'task2_1', 'func': 'analyze_approval_trends', 'data': 'result2',
+               'outputs': ['result/approval_trends.png'],
+               'libraries': ['pandas', 'matplotlib.pyplot', 'seaborn']},
+    'sunburst': {'module': 'task2_2', 'func': 'create_sunburst_chart', 'data': 'result2',
+                 'outputs': ['result/sunburst_chart.html'],
+                 'libraries': ['pandas', 'plotly.graph_objects']},
+    'categories': {'module': 'task2_3', 'func': 'analyze_product_categories', 'data': 'result2',
+                   'outputs': ['result/product_categories.png'],
+                   'libraries': ['pandas', 'matplotlib.pyplot', 'seaborn']},
+    'fat-protein': {'module': 'task2_4', 'func': 'analyze_fat_protein_distribution', 'data': 'result1',
+                    'outputs': ['result/fat_protein_distribution.png'],
+                    'libraries': ['pandas', 'matplotlib.pyplot', 'seaborn']},
+    'wordcloud': {'module': 'task2_5', 'func': 'create_word_cloud', 'data': 'result2',
+                  'outputs': ['result/wordcloud.png', 'result/word_frequencies.txt'],
+                  'libraries': ['pandas', 'jieba', 'wordcloud', 'matplotlib.pyplot']}
+}
+
+# 工作进程中的数据（由主进程读取一次后传入）
+_frames = {}
+
+# 工作进程启动时导入各图表模块的耗时，{模块名: 秒}，在该进程生成的第一个相应图表中报告
+_import_times = {}
+
+
+def _init_worker(frames, modules):
+    """
+    工作进程的初始化：保存数据，导入图表模块（主进程不导入绘图库，以forkserver/spawn方式启动的
+    工作进程各自导入）。导入失败时不在这里报错，生成该图表时再报告
+    """
+    os.environ['MPLBACKEND'] = 'Agg'
+    _frames.update(frames)
+    for module in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(module)
+        except Exception:
+            pass
+        _import_times[module] = time.perf_counter() - start
+
+
+def _render(name):
+    """
+    在工作进程中生成一个图表，图表函数打印的内容收集起来返回，由主进程按顺序输出
+    返回：
+        (图表名, 导入耗时, 生成耗时, 是否因输入未变化跳过绘制, 打印的内容, 错误信息或None)
+    """
+    chart = CHARTS[name]
+    output = io.StringIO()
+    error = None
+    import_time = _import_times.pop(chart['module'], 0.0)
+    start = time.perf_counter()
+    with redirect_stdout(output):
+        try:
+            func = getattr(importlib.import_module(chart['module']), chart['func'])
+            # 传入副本，图表函数对DataFrame的修改不影响其他图表
+            func(_frames[chart['data']].copy())
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e)}"
+        finally:
+            # 同一个工作进程会依次生成多个图表，关闭已保存的图形
+            if 'matplotlib.pyplot' in sys.modules:
+                sys.modules['matplotlib.pyplot'].close('all')
+    render_time = time.perf_counter() - start
+    chart_cache = sys.modules.get('chart_cache')
+    cached = chart_cache is not None and chart['outputs'][0] in chart_cache.skipped
+    return name, import_time, render_time, cached, output.getvalue(), error
+
+
+def render_charts(names=None, workers=None, frames=None):
+    """
+    在一个进程中读取一次数据，用多个工作进程并行生成图表（matplotlib使用无界面的Agg后端）
+    参数：
+        names: 要生成的图表名，None表示全部
+        workers: 工作进程数，None或0表示图表数与CPU核心数中较小的一个
+        frames: {'result1': DataFrame, 'result2': DataFrame}，未提供的从结果文件读取
+    返回：
+        [{'chart', 'import_s', 'render_s', 'cached', 'error'}]，按names的顺序
+    """
+    from result_store import load_result
+
+    names = list(names or CHARTS)
+    os.environ['MPLBACKEND'] = 'Agg'
+    frames = dict(frames or {})
+    for data in sorted({CHARTS[name]['data'] for name in names}):
+        if data not in frames:
+            print(f"读取{data}...")
+            frames[data] = load_result(data)
+
+    # 主进程读取数据时已加载pyarrow（有自己的线程池），fork出的工作进程可能继承被其他线程持有的锁，
+    # 因此用forkserver（没有时用spawn）启动工作进程，图表模块在工作进程中导入
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    modules = list(dict.fromkeys(CHARTS[name]['module'] for name in names))
+
+    workers = workers if workers and workers > 0 else min(len(names), os.cpu_count() or 1)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(frames, modules)) as executor:
+        results = list(executor.map(_render, names))
+    elapsed = time.perf_counter() - start
+
+    report = []
+    for name, import_time, render_time, cached, output, error in results:
+        print(f"\n[{name}]")
+        print(output, end='')
+        if error is not None:
+            print(f"处理过程中出错: {error}")
+        report.append({'chart': name, 'import_s': round(import_time, 3),
+                       'render_s': round(render_time, 3), 'cached': cached, 'error': error})
+
+    print(f"\n生成{len(names)}个图表，共{elapsed:.2f}秒（{workers}个工作进程）：")
+    for entry in report:
+        status = '出错' if entry['error'] is not None else '未变化，沿用上次的图表' if entry['cached'] else '完成'
+        print(f"  {entry['chart']:<14}{entry['render_s']:8.2f}秒  {status}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='读取一次数据，并行生成task2_1到task2_5的图表')
+    parser.add_argument('names', nargs='*', help=f"只生成这些图表（{'、'.join(CHARTS)}），默认全部")
+    parser.add_argument('--workers', type=int, default=None,
+                        help='工作进程数，默认为图表数与CPU核心数中较小的一个')
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in CHARTS]
+    if unknown:
+        parser.error(f"未知的图表: {', '.join(unknown)}")
+
+    render_charts(args.names or None, workers=args.workers)
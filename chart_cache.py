@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    # Windows没有fcntl，不加锁（只有chart_batch并行生成时才会同时写入）
+    fcntl = None
+
+# 图表输出的清单：{输出文件: {'fingerprint', 'outputs', 'render_s', 'rendered_at'}}
+CHART_MANIFEST_PATH = 'result/chart_manifest.json'
+
+# 本进程中因输入未变化而跳过的图表（主输出文件），chart_batch据此报告状态
+skipped = set()
+
+
+def chart_fingerprint(data, style, source=None):
+    """
+    图表输入的指纹：图表实际绘制的汇总数据、样式参数，以及绘图代码所在文件的内容
+    参数：
+        data: 汇总数据，DataFrame/Series或可JSON序列化的对象，或它们组成的列表
+        style: 样式参数（字体、尺寸、dpi、标题等）
+        source: 绘图代码所在的文件（通常为__file__），修改代码后重新绘制
+    """
+    digest = hashlib.sha256()
+    for value in (data if isinstance(data, (list, tuple)) else [data]):
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            digest.update(value.to_json(orient='split', force_ascii=False, double_precision=15,
+                                        date_format='iso').encode('utf-8'))
+        else:
+            digest.update(json.dumps(value, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(b'\0')
+    digest.update(json.dumps(style, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8'))
+    if source is not None:
+        digest.update(Path(source).read_bytes())
+    return digest.hexdigest()
+
+
+def load_chart_manifest(path=CHART_MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@contextmanager
+def _locked(path):
+    """
+    修改清单期间持有锁文件，并行生成图表时各进程的记录不会互相覆盖
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{path}.lock", 'w') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def record_chart(outputs, fingerprint, render_s, path=CHART_MANIFEST_PATH):
+    """
+    记录图表的指纹和绘制耗时（键为主输出文件）
+    """
+    with _locked(path):
+        manifest = load_chart_manifest(path)
+        manifest[outputs[0]] = {
+            'fingerprint': fingerprint,
+            'outputs': list(outputs),
+            'render_s': round(render_s, 3),
+            'rendered_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, path)
+
+
+def render_chart(outputs, data, style, draw, source=None, path=CHART_MANIFEST_PATH):
+    """
+    输入指纹与清单中的记录相同且输出文件都在时跳过绘制，否则调用draw()绘制并记录
+    参数：
+        outputs: draw生成的文件，第一个为主输出
+        data, style, source: 见chart_fingerprint
+        draw: 绘制并保存图表的函数（无参数）
+    返回：
+        是否重新绘制
+    """
+    fingerprint = chart_fingerprint(data, style, source)
+    entry = load_chart_manifest(path).get(outputs[0])
+    if (entry is not None and entry['fingerprint'] == fingerprint
+            and all(os.path.exists(output) for output in outputs)):
+        print(f"图表的数据和样式未变化，沿用{outputs[0]}（上次绘制耗时{entry['render_s']}秒）")
+        skipped.add(outputs[0])
+        return False
+
+    start = time.perf_counter()
+    draw()
+    record_chart(outputs, fingerprint, time.perf_counter() - start, path)
+    return True
@@ -0,0 +1,183 @@
+import argparse
+import importlib
+import sys
+import time
+from chart_batch import CHARTS as ALL_CHARTS
+
+# 统一入口：各子命令只在执行时导入自己需要的模块（pandas、matplotlib、jieba等导入都较慢），
+# 如recommend不会加载matplotlib和jieba
+
+# charts子命令的图表（词云是单独的子命令），需要的库按顺序单独导入以便统计各自的导入耗时
+CHARTS = {name: chart for name, chart in ALL_CHARTS.items() if name != 'wordcloud'}
+
+# 导入耗时统计中单独列出是否已加载的库
+HEAVY_LIBRARIES = ['pandas', 'pyarrow', 'pdfplumber', 'pypdfium2', 'matplotlib', 'seaborn', 'plotly',
+                   'jieba', 'wordcloud']
+
+
+class ImportTimer:
+    """
+    按顺序导入模块并记录每个模块的导入耗时（只计入该模块新加载的部分，已导入的模块不再记录）
+    """
+
+    def __init__(self):
+        self.times = []
+
+    def load(self, *names):
+        for name in names:
+            if name in sys.modules:
+                continue
+            start = time.perf_counter()
+            importlib.import_module(name)
+            self.times.append((name, time.perf_counter() - start))
+        return sys.modules[names[-1]]
+
+    def report(self):
+        total = sum(elapsed for _, elapsed in self.times)
+        print(f"\n导入耗时（共{total:.3f}秒）：")
+        for name, elapsed in self.times:
+            print(f"  {name:<24}{elapsed:8.3f}秒")
+        loaded = [name for name in HEAVY_LIBRARIES if name in sys.modules]
+        print(f"已加载的库: {'、'.join(loaded) if loaded else '无'}")
+
+
+def run_extract(args, timer):
+    """
+    task1_1和task1_2：从PDF中提取营养成分和产品信息
+    """
+    if args.only in (None, 'nutrition'):
+        task1_1 = timer.load('pandas', 'pdfplumber', 'task1_1')
+        task1_1.process_all_pdfs(workers=args.workers, use_store=not args.no_store,
+                                 incremental=args.incremental, prefetch_depth=args.prefetch)
+    if args.only in (None, 'label'):
+        task1_2 = timer.load('pandas', 'pdfplumber', 'task1_2')
+        task1_2.process_all_files(workers=args.workers, use_store=not args.no_store,
+                                  incremental=args.incremental, prefetch_depth=args.prefetch,
+                                  backend=args.backend)
+
+
+def run_classify(args, timer):
+    """
+    task1_3和task1_4：适用人群分类、注册证号解析
+    """
+    task1_3 = timer.load('pandas', 'pyarrow', 'task1_3')
+    task1_3.process_classification(incremental=args.incremental)
+    task1_4 = timer.load('task1_4')
+    task1_4.process_registration_info(incremental=args.incremental)
+
+
+def run_charts(args, timer):
+    """
+    task2_1到task2_4的图表，--batch时读取一次数据并行生成
+    """
+    if args.batch:
+        timer.load('pandas', 'chart_batch').render_charts(args.names or list(CHARTS), workers=args.workers)
+        return
+    for name in args.names or CHARTS:
+        chart = CHARTS[name]
+        print(f"\n[{name}]")
+        try:
+            getattr(timer.load(*chart['libraries'], chart['module']), chart['func'])()
+        except Exception as e:
+            print(f"处理过程中出错: {str(e)}")
+
+
+def run_wordcloud(args, timer):
+    """
+    task2_5：适用人群词云
+    """
+    chart = ALL_CHARTS['wordcloud']
+    timer.load(*chart['libraries'], chart['module']).main()
+
+
+def run_recommend(args, timer):
+    """
+    task3：按客户描述推荐产品，没有提供描述时运行task3中的示例
+    """
+    task3 = timer.load('pandas', 'pyarrow', 'task3')
+    if not args.descriptions:
+        task3.main()
+        return
+    recommender = task3.MedicalFoodRecommender()
+    for description in args.descriptions:
+        print(f"\n客户描述：{description}")
+        requirements = recommender.analyze_requirements(description)
+        print(f"提取到的需求：{requirements}")
+        recommender.recommend(requirements)
+
+
+def run_watch(args, timer):
+    """
+    监视DATA/books和data.xlsx，变化后重新执行流水线
+    """
+    watch = timer.load('pandas', 'watch')
+    watch.watch(args.targets or None, workers=args.workers, interval=args.interval,
+                debounce=args.debounce)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='特医食品数据分析的统一入口，各子命令只导入自己需要的库')
+    parser.add_argument('--import-times', action='store_true', help='结束时打印各模块的导入耗时')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    extract_parser = subparsers.add_parser(
+        'extract', help='从PDF中提取营养成分（task1_1）和产品信息（task1_2）',
+        description='分片、工作队列、隔离等其他选项见task1_1.py、task1_2.py')
+    extract_parser.add_argument('--only', choices=['nutrition', 'label'], default=None,
+                                help='只运行task1_1（nutrition）或task1_2（label）')
+    extract_parser.add_argument('--workers', type=int, default=1,
+                                help='并行解析PDF的进程数，0表示使用全部CPU核心（默认1）')
+    extract_parser.add_argument('--no-store', action='store_true',
+                                help='不使用共享PDF文本库和提取缓存，直接解析每个PDF')
+    extract_parser.add_argument('--incremental', action='store_true',
+                                help='增量模式：只处理新增或修改的PDF，并合并到已有结果中')
+    extract_parser.add_argument('--prefetch', type=int, default=0,
+                                help='顺序处理时用后台线程预读后面N个PDF到内存（默认0不预读）')
+    # 与pdf_text.BACKENDS相同，这里不导入pdf_text（会加载pdfplumber）
+    extract_parser.add_argument('--backend', choices=['pdfplumber', 'pdfium'], default='pdfplumber',
+                                help='task1_2的PDF解析后端（默认pdfplumber）')
+    extract_parser.set_defaults(handler=run_extract)
+
+    classify_parser = subparsers.add_parser('classify', help='适用人群分类（task1_3）和注册证号解析（task1_4）')
+    classify_parser.add_argument('--incremental', action='store_true',
+                                 help='增量模式：只处理还没有结果的行')
+    classify_parser.set_defaults(handler=run_classify)
+
+    charts_parser = subparsers.add_parser('charts', help='生成task2_1到task2_4的图表')
+    charts_parser.add_argument('names', nargs='*', help=f"只生成这些图表（{'、'.join(CHARTS)}），默认全部")
+    charts_parser.add_argument('--batch', action='store_true',
+                               help='读取一次数据，用多个工作进程并行生成（使用Agg后端）')
+    charts_parser.add_argument('--workers', type=int, default=None,
+                               help='--batch的工作进程数，默认为图表数与CPU核心数中较小的一个')
+    charts_parser.set_defaults(handler=run_charts)
+
+    wordcloud_parser = subparsers.add_parser('wordcloud', help='生成适用人群词云（task2_5）')
+    wordcloud_parser.set_defaults(handler=run_wordcloud)
+
+    recommend_parser = subparsers.add_parser('recommend', help='推荐产品（task3）')
+    recommend_parser.add_argument('descriptions', nargs='*',
+                                  help='客户描述，如"婴儿、蛋白质过敏"；默认运行task3中的示例')
+    recommend_parser.set_defaults(handler=run_recommend)
+
+    watch_parser = subparsers.add_parser('watch', help='监视DATA/books和data.xlsx，变化后重新执行流水线',
+                                         description='其他选项见watch.py')
+    watch_parser.add_argument('targets', nargs='*', help='只执行这些阶段（连同其上游阶段），默认全部阶段')
+    watch_parser.add_argument('--workers', type=int, default=1,
+                              help='task1_1、task1_2并行解析PDF的进程数，0表示使用全部CPU核心（默认1）')
+    watch_parser.add_argument('--interval', type=float, default=1.0, help='轮询间隔（秒，默认1）')
+    watch_parser.add_argument('--debounce', type=float, default=3.0,
+                              help='最后一次变化后等待多久没有新的变化才开始处理（秒，默认3）')
+    watch_parser.set_defaults(handler=run_watch)
+
+    args = parser.parse_args()
+    if args.command == 'charts':
+        unknown = [name for name in args.names if name not in CHARTS]
+        if unknown:
+            parser.error(f"未知的图表: {', '.join(unknown)}")
+
+    timer = ImportTimer()
+    try:
+        args.handler(args, timer)
+    finally:
+        if args.import_times:
+            timer.report()
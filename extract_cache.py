@@ -0,0 +1,225 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+# 提取缓存的保存位置
+CACHE_PATH = 'result/extract_cache.sqlite'
+
+
+# 本进程中已计算的内容哈希，{(路径, 大小, 修改时间): 哈希}
+_hashes = {}
+
+
+def content_hash(pdf_path, data=None):
+    """
+    计算文件内容的SHA-256哈希，作为缓存键。同一进程中文件的大小和修改时间未变时直接返回上次的结果，
+    文本库、清单和流水线的指纹共用，每个文件只读取一次
+    参数：
+        data: 已读入内存的文件内容，提供时不再读取文件
+    """
+    stat = os.stat(pdf_path)
+    key = (str(pdf_path), stat.st_size, stat.st_mtime_ns)
+    if key not in _hashes:
+        if data is not None:
+            _hashes[key] = hashlib.sha256(data).hexdigest()
+        else:
+            digest = hashlib.sha256()
+            with open(pdf_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+            _hashes[key] = digest.hexdigest()
+    return _hashes[key]
+
+
+class ExtractCache:
+    """
+    以PDF内容哈希+解析器版本为键的持久化提取缓存（SQLite）
+    保存每页文本（pages）以及解析出的字段（fields，如营养成分、标签内容），
+    内容未变的PDF不需要再用pdfplumber打开
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                content_hash TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                file_name TEXT,
+                data TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (content_hash, version)
+            );
+            CREATE TABLE IF NOT EXISTS fields (
+                content_hash TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (content_hash, kind, version)
+            );
+            CREATE TABLE IF NOT EXISTS stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+
+    def _get(self, table, where, params):
+        row = self.conn.execute(
+            f"SELECT data FROM {table} WHERE {where}", params).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute(
+            f"UPDATE {table} SET last_used = ? WHERE {where}", (time.time(),) + params)
+        return json.loads(row[0])
+
+    def get_pages(self, digest, version):
+        """
+        读取缓存的已解析页面，没有则返回None
+        """
+        return self._get('pages', 'content_hash = ? AND version = ?', (digest, version))
+
+    def put_pages(self, digest, version, file_name, document):
+        """
+        保存已解析的页面，document为{'pages': 每页内容列表, 'complete': 是否已解析全部页面}
+        """
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+            (digest, version, file_name, json.dumps(document, ensure_ascii=False), time.time()))
+
+    def peek_pages(self, digest, version):
+        """
+        读取缓存的每页内容，但不计入命中统计（用于检查哪些文件需要解析）
+        """
+        row = self.conn.execute(
+            "SELECT data FROM pages WHERE content_hash = ? AND version = ?",
+            (digest, version)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def get_fields(self, digest, kind, version):
+        """
+        读取缓存的解析结果（kind为'nutrition'、'label'等），没有则返回None
+        """
+        return self._get('fields', 'content_hash = ? AND kind = ? AND version = ?',
+                         (digest, kind, version))
+
+    def put_fields(self, digest, kind, version, data):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO fields VALUES (?, ?, ?, ?, ?)",
+            (digest, kind, version, json.dumps(data, ensure_ascii=False), time.time()))
+
+    def commit(self):
+        """
+        提交写入，并把本次运行的命中/未命中次数累加到统计表
+        """
+        for name, value in (('hits', self.hits), ('misses', self.misses)):
+            self.conn.execute(
+                "INSERT INTO stats VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, value))
+        self.hits = 0
+        self.misses = 0
+        self.conn.commit()
+
+    def stats(self):
+        """
+        返回缓存统计：累计命中/未命中次数、记录数和占用字节数
+        """
+        totals = dict(self.conn.execute("SELECT name, value FROM stats").fetchall())
+        pages_count, pages_bytes = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM pages").fetchone()
+        fields_count, fields_bytes = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM fields").fetchone()
+        return {
+            'hits': totals.get('hits', 0) + self.hits,
+            'misses': totals.get('misses', 0) + self.misses,
+            'documents': pages_count,
+            'fields': fields_count,
+            'data_bytes': pages_bytes + fields_bytes,
+            'file_bytes': os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        }
+
+    def evict(self, older_than_days=None, versions=None):
+        """
+        删除过期记录并压缩数据库文件
+        参数：
+            older_than_days: 删除超过该天数未被使用的记录，None表示不按时间删除
+            versions: {'pages': 当前版本, 'nutrition': 当前版本, ...}，删除其他版本的记录
+        返回：
+            删除的记录数
+        """
+        removed = 0
+        if older_than_days is not None:
+            cutoff = time.time() - older_than_days * 86400
+            for table in ('pages', 'fields'):
+                removed += self.conn.execute(
+                    f"DELETE FROM {table} WHERE last_used < ?", (cutoff,)).rowcount
+        if versions:
+            for kind, version in versions.items():
+                if kind == 'pages':
+                    removed += self.conn.execute(
+                        "DELETE FROM pages WHERE version != ?", (version,)).rowcount
+                else:
+                    removed += self.conn.execute(
+                        "DELETE FROM fields WHERE kind = ? AND version != ?",
+                        (kind, version)).rowcount
+        self.conn.commit()
+        self.conn.execute("VACUUM")
+        return removed
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+def current_versions():
+    """
+    当前各解析器的版本号，用于清理旧版本的缓存记录
+    """
+    import pdf_text
+    import task1_1
+    import task1_2
+    return {
+        'pages': pdf_text.TEXT_VERSION,
+        'nutrition': task1_1.NUTRITION_PARSER_VERSION,
+        'nutrition_coords': task1_1.NUTRITION_PARSER_VERSION,
+        'label': task1_2.LABEL_PARSER_VERSION,
+        'nutrition_pdfium': task1_1.NUTRITION_PARSER_VERSION,
+        'label_pdfium': task1_2.LABEL_PARSER_VERSION
+    }
+
+
+def print_stats(stats):
+    total = stats['hits'] + stats['misses']
+    hit_rate = stats['hits'] / total * 100 if total else 0
+    print(f"缓存命中: {stats['hits']}次，未命中: {stats['misses']}次（命中率{hit_rate:.1f}%）")
+    print(f"缓存文档数: {stats['documents']}个，解析结果数: {stats['fields']}条")
+    print(f"数据大小: {stats['data_bytes']}字节，文件大小: {stats['file_bytes']}字节")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='管理PDF提取缓存')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help='显示缓存统计')
+    vacuum_parser = subparsers.add_parser('vacuum', help='清理旧版本和长期未使用的记录并压缩')
+    vacuum_parser.add_argument('--older-than', type=float, default=None,
+                               help='同时删除超过该天数未被使用的记录')
+    args = parser.parse_args()
+
+    cache = ExtractCache()
+    if args.command == 'stats':
+        print_stats(cache.stats())
+    else:
+        removed = cache.evict(args.older_than, current_versions())
+        print(f"已删除{removed}条记录")
+        print_stats(cache.stats())
+    cache.close()
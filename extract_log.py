@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+from multiprocessing import Manager
+from pathlib import Path
+
+# 提取结果日志：便于人工查看的文本日志和便于程序读取的JSONL日志
+INFO_TEXT_PATH = 'result/info.txt'
+INFO_JSONL_PATH = 'result/info.jsonl'
+
+
+def format_entry(record):
+    """
+    把一条提取记录格式化为info.txt中的一段
+    """
+    entry = f"文件: {record['文件']}\n"
+    for key, value in record.items():
+        if key != '文件':
+            entry += f"{key}: {value}\n"
+    entry += "-" * 50 + "\n"
+    return entry
+
+
+class QueueSink:
+    """
+    工作进程中使用的日志写入端：记录放入队列，由主进程中的ExtractLog统一写入文件
+    """
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def write(self, record):
+        self.queue.put(record)
+
+
+class MemoryLog:
+    """
+    只把记录保存在内存中的日志（在单独的进程中处理文件时使用，记录随结果返回，由主进程写入）
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+
+class ExtractLog:
+    """
+    批量写入的提取结果日志：记录先缓存在内存中，攒够batch_size条或关闭时一次写入
+    info.txt和info.jsonl。多进程使用时通过queue_sink()取得写入端，
+    所有记录经同一个队列由主进程的写入线程写入，文件只有一个写入者
+    """
+
+    def __init__(self, text_path=INFO_TEXT_PATH, jsonl_path=INFO_JSONL_PATH, append=False,
+                 batch_size=200):
+        """
+        参数：
+            append: 为True时在已有日志后追加，否则重新创建日志文件
+            batch_size: 缓存多少条记录后写入一次
+        """
+        self.text_path = text_path
+        self.jsonl_path = jsonl_path
+        self.batch_size = batch_size
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.manager = None
+        self.queue = None
+        self.writer = None
+
+        Path(text_path).parent.mkdir(parents=True, exist_ok=True)
+        if not append or not os.path.exists(text_path):
+            with open(text_path, 'w', encoding='utf-8') as f:
+                f.write("提取结果日志\n")
+                f.write("=" * 50 + "\n")
+            open(jsonl_path, 'w', encoding='utf-8').close()
+
+    def write(self, record):
+        """
+        写入一条记录，格式为{'文件': 文件名, 字段: 值, ...}
+        """
+        with self.lock:
+            self.buffer.append(record)
+            if len(self.buffer) >= self.batch_size:
+                self._flush()
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        with open(self.text_path, 'a', encoding='utf-8') as f:
+            f.write(''.join(format_entry(record) for record in self.buffer))
+        with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in self.buffer))
+        self.buffer = []
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def queue_sink(self):
+        """
+        返回可以传给工作进程的写入端（QueueSink），并启动从队列读取记录的写入线程
+        """
+        if self.queue is None:
+            self.manager = Manager()
+            self.queue = self.manager.Queue()
+            self.writer = threading.Thread(target=self._drain, daemon=True)
+            self.writer.start()
+        return QueueSink(self.queue)
+
+    def _drain(self):
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+            self.write(record)
+
+    def close(self):
+        """
+        停止写入线程（队列中剩余的记录会先写完）并写入缓存中的记录
+        """
+        if self.queue is not None:
+            self.queue.put(None)
+            self.writer.join()
+            self.manager.shutdown()
+            self.queue = None
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
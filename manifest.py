@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from extract_cache import content_hash
+
+# 上次运行的输入清单
+MANIFEST_PATH = 'result/manifest.json'
+
+
+def load_manifest(task):
+    """
+    读取指定任务上次运行时的输入指纹，格式为{注册证号: 指纹}，没有则返回None
+    """
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    try:
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f).get(task)
+    except (OSError, ValueError) as e:
+        print(f"读取清单 {MANIFEST_PATH} 时出错: {str(e)}")
+        return None
+
+
+def save_manifest(task, fingerprints):
+    """
+    保存指定任务本次运行的输入指纹（其他任务的记录保持不变），fingerprints为None时删除该任务的记录
+    """
+    manifest = {}
+    if os.path.exists(MANIFEST_PATH):
+        try:
+            with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+    if fingerprints is None:
+        manifest.pop(task, None)
+    else:
+        manifest[task] = fingerprints
+
+    Path(MANIFEST_PATH).parent.mkdir(parents=True, exist_ok=True)
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+
+def pdf_fingerprint(pdf_path):
+    """
+    PDF文件的指纹（内容哈希，本进程中已计算过的直接复用），文件不存在时返回空字符串
+    """
+    if not os.path.exists(pdf_path):
+        return ''
+    return content_hash(pdf_path)
+
+
+def row_fingerprint(row, pdf_path):
+    """
+    data.xlsx中一行数据与对应PDF的组合指纹
+    """
+    digest = hashlib.sha256()
+    for value in row.values:
+        digest.update(str(value).encode('utf-8'))
+        digest.update(b'\0')
+    digest.update(pdf_fingerprint(pdf_path).encode('ascii'))
+    return digest.hexdigest()
+
+
+def diff_fingerprints(previous, current):
+    """
+    对比上次和本次的输入指纹
+    返回：
+        dict: {'added': [...], 'modified': [...], 'removed': [...], 'unchanged': [...]}
+    """
+    previous = previous or {}
+    changes = {'added': [], 'modified': [], 'removed': [], 'unchanged': []}
+    for key, fingerprint in current.items():
+        if key not in previous:
+            changes['added'].append(key)
+        elif previous[key] != fingerprint:
+            changes['modified'].append(key)
+        else:
+            changes['unchanged'].append(key)
+    changes['removed'] = [key for key in previous if key not in current]
+    return changes
+
+
+def print_changes(changes):
+    print(f"增量模式：新增{len(changes['added'])}个，修改{len(changes['modified'])}个，"
+          f"删除{len(changes['removed'])}个，未变化{len(changes['unchanged'])}个")
@@ -0,0 +1,176 @@
+import json
+import os
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+# 每份文件的耗时记录的保存位置（每行一条JSON记录）
+METRICS_PATH = 'result/metrics.jsonl'
+
+# 本进程中每份文件的记录，{文件名: 记录}；为None时不记录（未调用enable）
+_records = None
+
+# 是否记录每份文件的内存峰值（tracemalloc会让解析变慢）
+_trace_memory = False
+
+
+def enable(trace_memory=True):
+    """
+    开始记录每份文件的耗时（以及内存峰值）
+    """
+    global _records, _trace_memory
+    if _records is None:
+        _records = {}
+    _trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def enabled():
+    return _records is not None
+
+
+def _record(pdf_path):
+    path = Path(pdf_path)
+    record = _records.get(path.name)
+    if record is None:
+        record = _records[path.name] = {
+            'file': path.name,
+            'bytes': os.path.getsize(path) if os.path.exists(path) else 0,
+            'pages': 0,
+            'open_s': 0.0,
+            'page_s': [],
+            'parse_s': 0.0,
+            'peak_bytes': 0
+        }
+    return record
+
+
+def add(pdf_path, key, seconds):
+    """
+    累加某个阶段的耗时（如open_s、parse_s）
+    """
+    if _records is not None:
+        _record(pdf_path)[key] += seconds
+
+
+def add_page(pdf_path, seconds):
+    """
+    记录一页文本提取的耗时
+    """
+    if _records is not None:
+        record = _record(pdf_path)
+        record['page_s'].append(seconds)
+        record['pages'] = len(record['page_s'])
+
+
+@contextmanager
+def document(pdf_path):
+    """
+    在解析一份PDF期间记录内存峰值（Python分配的内存，tracemalloc统计）
+    """
+    if _records is None or not _trace_memory:
+        yield
+        return
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        record = _record(pdf_path)
+        record['peak_bytes'] = max(record['peak_bytes'], tracemalloc.get_traced_memory()[1])
+
+
+def timed(pdf_path, key, func):
+    """
+    返回记录耗时的func包装，未开启记录时直接返回func
+    """
+    if _records is None:
+        return func
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            add(pdf_path, key, time.perf_counter() - start)
+
+    return wrapper
+
+
+def collect(func, *args, **kwargs):
+    """
+    在工作进程中调用func并取出本次调用产生的记录，返回(func的结果, 记录列表)，
+    由主进程用merge合并
+    """
+    enable()
+    _records.clear()
+    result = func(*args, **kwargs)
+    records = list(_records.values())
+    _records.clear()
+    return result, records
+
+
+def merge(records):
+    """
+    合并工作进程返回的记录
+    """
+    if _records is None:
+        return
+    for other in records:
+        record = _record(other['file'])
+        record['open_s'] += other['open_s']
+        record['parse_s'] += other['parse_s']
+        record['page_s'] += other['page_s']
+        record['pages'] = len(record['page_s'])
+        record['bytes'] = other['bytes'] or record['bytes']
+        record['peak_bytes'] = max(record['peak_bytes'], other['peak_bytes'])
+
+
+def records():
+    """
+    返回所有记录（按总耗时从高到低），每条记录附加text_s（逐页提取耗时之和）和total_s
+    """
+    result = []
+    for record in (_records or {}).values():
+        record = dict(record)
+        record['text_s'] = sum(record['page_s'])
+        record['total_s'] = record['open_s'] + record['text_s'] + record['parse_s']
+        result.append(record)
+    return sorted(result, key=lambda record: record['total_s'], reverse=True)
+
+
+def save(path=METRICS_PATH):
+    """
+    保存记录（JSONL，每份文件一行），最后一行为本进程的汇总（最大常驻内存等）
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records():
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        summary = {
+            'summary': True,
+            'documents': len(_records or {}),
+            'max_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        }
+        f.write(json.dumps(summary, ensure_ascii=False) + '\n')
+
+
+def print_slowest(count=10):
+    """
+    打印耗时最长的文件，以及它们占全部解析耗时的比例
+    """
+    all_records = records()
+    if not all_records:
+        print("没有耗时记录（文件可能全部命中提取缓存）")
+        return
+    total = sum(record['total_s'] for record in all_records)
+    slowest = all_records[:count]
+    share = sum(record['total_s'] for record in slowest) / total * 100 if total else 0
+    print(f"共{len(all_records)}个文件，解析总耗时{total:.2f}秒，最慢的{len(slowest)}个占{share:.1f}%：")
+    print("文件\t页数\t字节数\t打开(s)\t文本(s)\t解析(s)\t合计(s)\t内存峰值(MB)")
+    for record in slowest:
+        print(f"{record['file']}\t{record['pages']}\t{record['bytes']}\t{record['open_s']:.3f}\t"
+              f"{record['text_s']:.3f}\t{record['parse_s']:.3f}\t{record['total_s']:.3f}\t"
+              f"{record['peak_bytes'] / 1048576:.1f}")
@@ -0,0 +1,358 @@
+import argparse
+import json
+import os
+import re
+import unicodedata
+import numpy as np
+
+# 营养成分矩阵的保存位置（与result1.arrow放在一起）
+MATRIX_PATH = 'result/nutrient_matrix.arrow'
+
+# 常见的计量基准列，矩阵中的列按此顺序排列，其余基准列排在后面
+BASES = ['每100g', '每100mL', '每100kJ', '每份']
+
+# 数值单元格：可带"≤"、"<"前缀的数字
+VALUE_PATTERN = re.compile(r'^[≤<]?\d+(\.\d+)?$')
+
+# 表示"无数据"的单元格
+MISSING_TOKENS = {'-', '—', '——', '/'}
+
+
+def normalize_name(text):
+    """
+    统一营养成分名称的写法：全角字符转半角，去掉空格
+    """
+    return ''.join(unicodedata.normalize('NFKC', text).split())
+
+
+def parse_value(token):
+    """
+    解析数值单元格，无数据时返回None
+    """
+    if token in MISSING_TOKENS:
+        return None
+    return float(token.lstrip('≤<'))
+
+
+def is_value(token):
+    return token in MISSING_TOKENS or VALUE_PATTERN.match(token) is not None
+
+
+def add_subscript(name, subscript):
+    """
+    把单独成行的下标（如维生素B1的"1"）插入到单位之前：维生素B(mg) -> 维生素B1(mg)
+    """
+    unit_start = name.rfind('(')
+    if unit_start > 0 and name.endswith(')'):
+        return name[:unit_start] + subscript + name[unit_start:]
+    return name + subscript
+
+
+def parse_nutrient_rows(table_lines):
+    """
+    解析营养成分表的每一行（维生素、矿物质等全部营养成分），保留所有计量基准列
+    处理以下情况：
+    1. 表头在跨页时重复出现
+    2. 单元格换行，营养成分名称的后半部分（如"(mg)"、"RE)"）单独成行
+    3. 维生素的下标（如B1、B12中的"1"、"12"）单独成行
+    参数：
+        text_lines: 营养成分表部分的文本行
+    返回：
+        dict: {'bases': [计量基准列名, ...], 'rows': {营养成分名称: [各列的值, 无数据为None]}}
+    """
+    bases = []
+    rows = {}
+    last_name = None
+
+    for line in table_lines:
+        parts = line.split()
+        if not parts:
+            continue
+
+        # 表头行，如"营养成分 每100g 每100kJ 每份"（跨页时会重复出现）
+        if any(part.startswith('每') for part in parts[1:]) and not is_value(parts[-1]):
+            if not bases:
+                bases = [normalize_name(part) for part in parts[1:]]
+            continue
+        if not bases:
+            continue
+
+        # 行尾的数值单元格
+        count = 0
+        while count < min(len(parts), len(bases)) and is_value(parts[len(parts) - 1 - count]):
+            count += 1
+        name_parts = parts[:len(parts) - count]
+
+        if not name_parts:
+            # 单独成行的短整数是上一行营养成分的下标，其余的纯数值行无法对应名称，跳过
+            if last_name is not None and len(parts) == 1 and parts[0].isdigit() and len(parts[0]) <= 2:
+                renamed = add_subscript(last_name, parts[0])
+                if renamed not in rows:
+                    rows[renamed] = rows.pop(last_name)
+                    last_name = renamed
+            continue
+
+        if count == 0:
+            # 没有数值的行是上一行营养成分名称的换行部分
+            if last_name is not None:
+                renamed = last_name + normalize_name(line)
+                if renamed not in rows:
+                    rows[renamed] = rows.pop(last_name)
+                    last_name = renamed
+            continue
+
+        name = normalize_name(''.join(name_parts))
+        if name in rows:
+            # 同名的行只保留第一次出现的值
+            last_name = None
+            continue
+        values = [parse_value(token) for token in parts[len(parts) - count:]]
+        rows[name] = values + [None] * (len(bases) - len(values))
+        last_name = name
+
+    return {'bases': bases, 'rows': rows}
+
+
+def group_rows(words):
+    """
+    按纵坐标把单词分成行：与行首单词在纵向上重叠的单词属于同一行
+    （维生素下标等位置略低的单词会归入所在的行）
+    """
+    rows = []
+    for word in sorted(words, key=lambda word: (word[2], word[1])):
+        if rows and word[2] < rows[-1][0][4] - 1:
+            rows[-1].append(word)
+        else:
+            rows.append([word])
+    return [sorted(row, key=lambda word: word[1]) for row in rows]
+
+
+def nearest_column(word, header):
+    """
+    返回与单词水平距离最近的表头列
+    """
+    center = (word[1] + word[3]) / 2
+    distances = [max(cell[1] - center, center - cell[3], 0) for cell in header]
+    return distances.index(min(distances))
+
+
+def parse_nutrient_words(pages_words):
+    """
+    按单词坐标解析营养成分表（见pdf_text.region_words、pdf_text.read_region_words）
+    数值按横坐标对应到最近的表头列，而不是按在行中的位置，
+    因此缺少单元格、单元格换行以及两种表头格式（每100g 每100mL 每100kJ / 每100g 每100kJ 每份）都能正确处理
+    参数：
+        pages_words: 每页营养成分表区域内的单词坐标列表
+    返回：
+        dict: 格式同parse_nutrient_rows
+    """
+    bases = []
+    rows = {}
+    last_name = None
+    pending = None  # 只有名称没有数值的行，可能是上一行名称的换行部分，也可能是下一行的名称
+
+    def rename(suffix):
+        # 换行部分接到上一行名称后面，单独的数字是下标
+        nonlocal last_name
+        if last_name is None:
+            return
+        renamed = add_subscript(last_name, suffix) if suffix.isdigit() else last_name + suffix
+        if renamed not in rows:
+            rows[renamed] = rows.pop(last_name)
+            last_name = renamed
+
+    header = None
+    for words in pages_words:
+        for row in group_rows(words):
+            # 表头行，如"营养成分 每100g 每100kJ 每份"（跨页时可能重复出现，没有重复时沿用上一页的表头）
+            if any(word[0].startswith('每') for word in row[1:]) and not is_value(row[-1][0]):
+                header = [word for word in row if word[0].startswith('每')]
+                name_cells = [word for word in row if not word[0].startswith('每')]
+                boundary = (name_cells[-1][3] + header[0][1]) / 2 if name_cells else header[0][1] - 5
+                if not bases:
+                    bases = [normalize_name(word[0]) for word in header]
+                continue
+            if header is None:
+                continue
+
+            values = [None] * len(bases)
+            name_parts = []
+            has_values = False
+            for word in row:
+                if is_value(word[0]) and (word[1] + word[3]) / 2 >= boundary:
+                    has_values = True
+                    column = nearest_column(word, header)
+                    if column < len(values) and values[column] is None:
+                        values[column] = parse_value(word[0])
+                else:
+                    name_parts.append(word[0])
+            name = normalize_name(''.join(name_parts))
+
+            if not has_values:
+                # 只有名称的行，等看到下一行再决定归属
+                if pending is not None:
+                    rename(pending)
+                pending = name
+                continue
+
+            if not name and pending is not None:
+                # 数值行没有名称：名称在上一行（单元格内容在数值上方换行）
+                name, pending = pending, None
+            elif pending is not None:
+                rename(pending)
+                pending = None
+            if not name:
+                continue
+
+            if name in rows:
+                # 同名的行只保留第一次出现的值
+                last_name = None
+                continue
+            rows[name] = values
+            last_name = name
+
+    if pending is not None:
+        rename(pending)
+
+    return {'bases': bases, 'rows': rows}
+
+
+def order_bases(bases):
+    """
+    按BASES的顺序排列计量基准列，不在BASES中的排在后面
+    """
+    known = [base for base in BASES if base in bases]
+    return known + [base for base in bases if base not in known]
+
+
+class NutrientMatrix:
+    """
+    全部产品的营养成分矩阵：values[产品, 营养成分, 计量基准]，没有数据的为NaN。
+    与结果一样保存为不压缩的Arrow IPC文件（result_store）：数值按行展开为一列，
+    注册证号、营养成分和计量基准记在表的元数据中，读取时内存映射，values直接引用文件中的数据，
+    不需要解压和复制，后续分析可以直接按营养成分和计量基准做向量化查询，不需要再解析PDF
+    """
+
+    def __init__(self, reg_numbers, nutrients, bases, values):
+        self.reg_numbers = list(reg_numbers)
+        self.nutrients = list(nutrients)
+        self.bases = list(bases)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.reg_index = {reg_number: i for i, reg_number in enumerate(self.reg_numbers)}
+        self.nutrient_index = {nutrient: i for i, nutrient in enumerate(self.nutrients)}
+        self.base_index = {base: i for i, base in enumerate(self.bases)}
+
+    @classmethod
+    def from_tables(cls, tables):
+        """
+        由各产品的parse_nutrient_rows结果建立矩阵
+        参数：
+            tables: {注册证号: parse_nutrient_rows的结果，没有营养成分表的为None}
+        """
+        nutrients = {}
+        bases = {}
+        for table in tables.values():
+            if table:
+                nutrients.update(dict.fromkeys(table['rows']))
+                bases.update(dict.fromkeys(table['bases']))
+        nutrients = list(nutrients)
+        bases = order_bases(list(bases))
+
+        nutrient_index = {nutrient: i for i, nutrient in enumerate(nutrients)}
+        base_index = {base: i for i, base in enumerate(bases)}
+        values = np.full((len(tables), len(nutrients), len(bases)), np.nan)
+        for i, table in enumerate(tables.values()):
+            if not table:
+                continue
+            columns = [base_index[base] for base in table['bases']]
+            for name, row in table['rows'].items():
+                for column, value in zip(columns, row):
+                    if value is not None:
+                        values[i, nutrient_index[name], column] = value
+
+        return cls(tables.keys(), nutrients, bases, values)
+
+    def select(self, reg_numbers):
+        """
+        按注册证号取出部分产品（不存在的注册证号对应的行全部为NaN）
+        """
+        values = np.full((len(reg_numbers), len(self.nutrients), len(self.bases)), np.nan)
+        for i, reg_number in enumerate(reg_numbers):
+            if reg_number in self.reg_index:
+                values[i] = self.values[self.reg_index[reg_number]]
+        return NutrientMatrix(reg_numbers, self.nutrients, self.bases, values)
+
+    def merge(self, other, reg_numbers):
+        """
+        合并两个矩阵（营养成分和计量基准取并集），按reg_numbers的顺序排列，
+        同一注册证号以other中的数据为准
+        """
+        nutrients = list(dict.fromkeys(self.nutrients + other.nutrients))
+        bases = order_bases(list(dict.fromkeys(self.bases + other.bases)))
+        values = np.full((len(reg_numbers), len(nutrients), len(bases)), np.nan)
+        for source, skip in ((self, other.reg_index), (other, {})):
+            rows = [i for i, reg_number in enumerate(reg_numbers)
+                    if reg_number in source.reg_index and reg_number not in skip]
+            if not rows:
+                continue
+            taken = source.values[[source.reg_index[reg_numbers[i]] for i in rows]]
+            values[np.ix_(rows, [nutrients.index(n) for n in source.nutrients],
+                          [bases.index(b) for b in source.bases])] = taken
+        return NutrientMatrix(reg_numbers, nutrients, bases, values)
+
+    def column(self, nutrient, base='每100kJ'):
+        """
+        返回所有产品某个营养成分在某个计量基准下的值（一维数组，按reg_numbers的顺序）
+        """
+        return self.values[:, self.nutrient_index[nutrient], self.base_index[base]]
+
+    def to_frame(self, base='每100kJ'):
+        """
+        返回某个计量基准下的二维表（行为注册证号，列为营养成分）
+        """
+        import pandas as pd
+        return pd.DataFrame(self.values[:, :, self.base_index[base]],
+                            index=pd.Index(self.reg_numbers, name='注册证号'),
+                            columns=self.nutrients)
+
+    def save(self, path=MATRIX_PATH):
+        import pyarrow as pa
+        from result_store import write_arrow
+        labels = {'reg_numbers': self.reg_numbers, 'nutrients': self.nutrients, 'bases': self.bases}
+        metadata = {key: json.dumps(value, ensure_ascii=False) for key, value in labels.items()}
+        table = pa.table({'values': pa.array(self.values.reshape(-1), type=pa.float64())})
+        write_arrow(table.replace_schema_metadata(metadata), path)
+
+    @classmethod
+    def load(cls, path=MATRIX_PATH):
+        """
+        读取保存的营养成分矩阵（内存映射，values为只读数组），文件不存在时返回None
+        """
+        if not os.path.exists(path):
+            return None
+        from result_store import open_arrow
+        table = open_arrow(path)
+        labels = {key.decode('utf-8'): json.loads(value) for key, value in table.schema.metadata.items()}
+        values = table.column('values').to_numpy()
+        shape = (len(labels['reg_numbers']), len(labels['nutrients']), len(labels['bases']))
+        return cls(labels['reg_numbers'], labels['nutrients'], labels['bases'], values.reshape(shape))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='查看task1_1生成的营养成分矩阵')
+    parser.add_argument('nutrient', nargs='?', help='营养成分名称，如"钙(mg)"；不指定时列出所有营养成分')
+    parser.add_argument('--base', default='每100kJ', help='计量基准列（默认每100kJ）')
+    args = parser.parse_args()
+
+    matrix = NutrientMatrix.load()
+    if matrix is None:
+        print(f"没有找到{MATRIX_PATH}，请先运行task1_1.py")
+    elif args.nutrient is None:
+        print(f"产品数: {len(matrix.reg_numbers)}，计量基准: {'、'.join(matrix.bases)}")
+        counts = (~np.isnan(matrix.values).all(axis=2)).sum(axis=0)
+        for nutrient, count in zip(matrix.nutrients, counts):
+            print(f"{nutrient}\t{count}个产品")
+    else:
+        values = matrix.column(args.nutrient, args.base)
+        for reg_number, value in zip(matrix.reg_numbers, values):
+            print(f"{reg_number}\t{value}")
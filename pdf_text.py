@@ -0,0 +1,543 @@
+import pdfplumber
+import pypdfium2
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+import metrics
+from extract_cache import ExtractCache, content_hash, print_stats
+
+# 文本提取格式的版本号，提取方式变化时递增，使缓存中的旧文本失效
+TEXT_VERSION = 2
+
+# 可选的PDF解析后端：pdfplumber做完整的字符级布局分析，提供单词坐标（营养成分表需要）；
+# pdfium（pypdfium2，pdfplumber本身的依赖）只读取文本流，不做布局分析，快得多，但不提供单词坐标，
+# 数字与汉字之间的空格也与pdfplumber不完全一致（如“10 岁以上”，task1_2解析标签时统一，见normalize_label）
+BACKENDS = ('pdfplumber', 'pdfium')
+
+# 预读到内存中的PDF内容，{路径: 文件内容}，由prefetch填入
+_buffers = {}
+
+
+def read_file(pdf_path):
+    with open(pdf_path, 'rb') as f:
+        return f.read()
+
+
+def prefetch(pdf_files, depth=4):
+    """
+    按顺序返回pdf_files中的路径，同时用后台线程预读后面depth个文件到内存。
+    返回某个文件时它的内容已在内存中，open_pdf和PdfTextStore.content_hash直接使用，
+    读取（网络存储上的）文件的等待时间与前面文件的解析重叠；处理下一个文件时释放上一个文件的内容
+    参数：
+        depth: 预读的文件数，0表示不预读
+    """
+    if not depth:
+        yield from pdf_files
+        return
+
+    pdf_files = list(pdf_files)
+    with ThreadPoolExecutor(max_workers=depth) as executor:
+        futures = {}
+        for i, pdf_path in enumerate(pdf_files):
+            for j in range(i, min(i + depth + 1, len(pdf_files))):
+                if j not in futures:
+                    futures[j] = executor.submit(read_file, pdf_files[j])
+            key = str(pdf_path)
+            try:
+                _buffers[key] = futures.pop(i).result()
+            except OSError:
+                # 读取失败（如文件不存在）时不预读，由解析时按原来的方式处理
+                pass
+            try:
+                yield pdf_path
+            finally:
+                _buffers.pop(key, None)
+
+
+def open_pdf(pdf_path):
+    """
+    打开PDF：已预读到内存的从内存中打开，否则从磁盘打开
+    """
+    data = _buffers.get(str(pdf_path))
+    return pdfplumber.open(io.BytesIO(data) if data is not None else pdf_path)
+
+
+def iter_pages(pdf_path, start=0, with_words=True, backend='pdfplumber'):
+    """
+    按需逐页解析PDF，每处理完一页即清空该页的缓存（字符、布局等），降低内存占用
+    参数：
+        pdf_path: PDF文件路径
+        start: 从第几页开始（0开始计数），用于接着已解析的部分继续
+        with_words: 是否同时提取单词坐标
+        backend: 解析后端，见BACKENDS；'pdfium'只能提取文本（with_words须为False）
+    返回：
+        生成器，每页一个字典：{'text': 页面文本, 'words': [[文字, x0, top, x1, bottom], ...]}
+    """
+    if backend == 'pdfium':
+        if with_words:
+            raise ValueError("pdfium后端只提取文本，不提供单词坐标")
+        yield from iter_pdfium_pages(pdf_path, start)
+        return
+    if backend != 'pdfplumber':
+        raise ValueError(f"未知的解析后端: {backend}")
+
+    with metrics.document(pdf_path):
+        opened = time.perf_counter()
+        with open_pdf(pdf_path) as pdf:
+            pages = pdf.pages[start:]
+            metrics.add(pdf_path, 'open_s', time.perf_counter() - opened)
+            for page in pages:
+                page_start = time.perf_counter()
+                entry = {'text': page.extract_text() or ''}
+                if with_words:
+                    entry['words'] = [
+                        [word['text'], round(word['x0'], 2), round(word['top'], 2),
+                         round(word['x1'], 2), round(word['bottom'], 2)]
+                        for word in page.extract_words()
+                    ]
+                page.close()
+                metrics.add_page(pdf_path, time.perf_counter() - page_start)
+                yield entry
+
+
+def iter_pdfium_pages(pdf_path, start=0):
+    """
+    用pdfium逐页读取PDF的文本流（不做布局分析），返回格式同iter_pages（只有text）
+    """
+    with metrics.document(pdf_path):
+        opened = time.perf_counter()
+        data = _buffers.get(str(pdf_path))
+        pdf = pypdfium2.PdfDocument(data if data is not None else str(pdf_path))
+        try:
+            metrics.add(pdf_path, 'open_s', time.perf_counter() - opened)
+            for index in range(start, len(pdf)):
+                page_start = time.perf_counter()
+                page = pdf[index]
+                text_page = page.get_textpage()
+                text = text_page.get_text_bounded().replace('\r\n', '\n').replace('\r', '\n')
+                text_page.close()
+                page.close()
+                metrics.add_page(pdf_path, time.perf_counter() - page_start)
+                yield {'text': text}
+        finally:
+            pdf.close()
+
+
+def extract_pages(pdf_path, with_words=True, stop=None, pages=None, backend='pdfplumber'):
+    """
+    解析PDF文件，返回每一页的文本（以及单词坐标）
+    参数：
+        pdf_path: PDF文件路径
+        with_words: 是否同时保存单词坐标
+        stop: 停止条件，参数为已解析部分的整篇文本，返回True时不再解析后面的页面；
+              为None时解析全部页面
+        pages: 之前已解析的前若干页，从其后继续解析
+        backend: 解析后端，见iter_pages
+    返回：
+        dict: {'pages': 每页内容列表, 'complete': 是否已解析到最后一页}
+    """
+    pages = list(pages or [])
+    if stop is not None and stop(pages_to_text(pages)):
+        return {'pages': pages, 'complete': False}
+
+    text = pages_to_text(pages)
+    for entry in iter_pages(pdf_path, len(pages), with_words, backend):
+        pages.append(entry)
+        text += entry['text'] + '\n'
+        if stop is not None and stop(text):
+            return {'pages': pages, 'complete': False}
+    return {'pages': pages, 'complete': True}
+
+
+def extract_missing(stop, item):
+    """
+    解析PdfTextStore.build中缓存缺少的一个文件，item为(PDF路径, 已解析的页面)
+    """
+    pdf_path, done = item
+    return extract_pages(pdf_path, True, stop, done)
+
+
+def print_dedup_stats(stats):
+    print(f"去重：{stats['files']}个文件中，字节相同的重复文件{stats['byte_duplicates']}个，"
+          f"内容相同而复用解析结果的{stats['content_duplicates']}个（去重比例{stats['ratio'] * 100:.1f}%）；"
+          f"文字相同但排版不同（仍分别解析）的{stats['near_duplicates']}个")
+
+
+def pages_to_text(pages):
+    """
+    将每页文本拼接为整篇文本，每页末尾追加换行
+    """
+    return ''.join(page['text'] + '\n' for page in pages)
+
+
+def input_fingerprint(source):
+    """
+    解析输入（整篇文本或每页内容）的精确指纹：包括换行和单词坐标，与解析器看到的输入完全一致，
+    指纹相同的输入解析结果一定相同
+    """
+    return hashlib.sha256(json.dumps(source, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def content_fingerprint(source):
+    """
+    解析输入的文字指纹：只取文本，NFKC规范化并合并空白，不包含单词坐标。
+    只用于统计排版不同但文字相同的近似重复文件，不能用来复用解析结果
+    （换行或单词位置不同时解析结果可能不同）
+    """
+    text = pages_to_text(source) if isinstance(source, list) else source
+    text = re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', text)).strip()
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def read_pdf_text(pdf_path, stop=None, backend='pdfplumber'):
+    """
+    直接解析PDF并返回整篇文本（不经过共享文本库）
+    参数：
+        stop: 停止条件，见extract_pages
+        backend: 解析后端，见BACKENDS
+    """
+    return pages_to_text(extract_pages(pdf_path, with_words=False, stop=stop, backend=backend)['pages'])
+
+
+def find_region(words, start, ends, top=None):
+    """
+    根据单词坐标确定页面中的表格区域
+    参数：
+        words: 单词坐标列表，格式同iter_pages中的words
+        start: 区域开始标记（如'营养成分表'），区域从标记所在行的下方开始；
+               为None表示区域从页面顶部开始（表格从上一页延续过来）
+        ends: 结束标记，区域到第一个包含其中任一标记的单词（位于开始标记下方）为止
+        top: 已知的区域上边界，提供时不再查找开始标记
+    返回：
+        (上边界, 下边界)，下边界为None表示区域一直延续到页面底部；页面中没有开始标记时返回None
+    """
+    if top is None:
+        if start is None:
+            top = 0
+        else:
+            marks = [word for word in words if start in word[0]]
+            if not marks:
+                return None
+            top = marks[0][4]
+
+    bottom = None
+    for word in words:
+        if word[2] >= top and any(end in word[0] for end in ends):
+            if bottom is None or word[2] < bottom:
+                bottom = word[2]
+    return top, bottom
+
+
+def region_words(pages, start, ends):
+    """
+    从已解析的每页单词坐标中取出表格区域内的单词（表格可以跨页）
+    参数：
+        pages: 每页内容列表（需包含words），见iter_pages
+        start, ends: 开始和结束标记，见find_region
+    返回：
+        每页区域内的单词列表，没有找到开始标记时返回空列表
+    """
+    result = []
+    for page in pages:
+        region = find_region(page['words'], start if not result else None, ends)
+        if region is None:
+            continue
+        top, bottom = region
+        result.append([word for word in page['words']
+                       if word[2] >= top and (bottom is None or word[4] <= bottom)])
+        if bottom is not None:
+            break
+    return result
+
+
+def read_region_words(pdf_path, start, ends):
+    """
+    直接解析PDF中的表格区域：用字符坐标定位区域后裁剪页面，只在裁剪区域内做单词布局分析，
+    不需要对整页做文本布局，找到结束标记后不再解析后面的页面
+    参数：
+        start, ends: 开始和结束标记，见find_region
+    返回：
+        每页区域内的单词列表（格式同iter_pages中的words）
+    """
+    result = []
+    with metrics.document(pdf_path):
+        opened = time.perf_counter()
+        with open_pdf(pdf_path) as pdf:
+            pages = pdf.pages
+            metrics.add(pdf_path, 'open_s', time.perf_counter() - opened)
+            for page in pages:
+                page_start = time.perf_counter()
+                words = region_page_words(page, start if not result else None, ends)
+                page.close()
+                metrics.add_page(pdf_path, time.perf_counter() - page_start)
+                if words is None:
+                    continue
+                words, complete = words
+                result.append(words)
+                if complete:
+                    break
+    return result
+
+
+def region_page_words(page, start, ends):
+    """
+    在一页中定位表格区域，并只对区域内的字符做单词布局分析
+    参数：
+        page: pdfplumber的页面
+        start, ends: 开始和结束标记，见find_region
+    返回：
+        (区域内的单词列表, 是否已到达结束标记)，页面中没有开始标记时返回None
+    """
+    # 字符级的坐标不需要布局分析，用来定位标记的位置
+    chars = page.chars
+    text = ''.join(char['text'] for char in chars)
+    top = None
+    if start is not None:
+        index = text.find(start)
+        if index == -1:
+            return None
+        top = chars[index]['bottom']
+    marks = [[text[i:i + len(end)], chars[i]['x0'], chars[i]['top'], chars[i]['x1'], chars[i]['bottom']]
+             for end in ends for i in range(len(text)) if text.startswith(end, i)]
+    top, bottom = find_region(marks, None, ends, top)
+
+    # 只保留完全位于区域内的字符，区域边界上的下一段文字不会被截进来
+    crop = page.within_bbox((0, top, page.width, page.height if bottom is None else bottom))
+    words = [
+        [word['text'], round(word['x0'], 2), round(word['top'], 2),
+         round(word['x1'], 2), round(word['bottom'], 2)]
+        for word in crop.extract_words()
+    ]
+    return words, bottom is not None
+
+
+class PdfTextStore:
+    """
+    PDF文本库：每个PDF只解析一次，保存每页文本和单词坐标，
+    供营养成分表解析（task1_1）和【标签】解析（task1_2）共同读取。
+    内容持久化在以内容哈希为键的提取缓存（ExtractCache）中，
+    解析出的字段也一并缓存，内容未变的PDF不会再被打开。
+    本次运行中的重复文件只解析一次：字节相同的文件共用同一份文本和解析结果；
+    字节不同但解析输入完全相同的文件（如只有元数据不同的副本，见input_fingerprint）
+    复用第一份的解析结果；文字相同但排版不同的文件仍分别解析，只计入统计
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else ExtractCache()
+        # 本次运行中每个文件的内容哈希，{路径: 哈希}
+        self.digests = {}
+        # 按解析输入的精确指纹保存的解析结果，{(指纹, 类别, 版本): JSON}
+        self.parsed = {}
+        # 复用了其他文件解析结果的文件（内容哈希）
+        self.reused = set()
+        # 解析过的文字指纹，{(文字指纹, 类别, 版本): 内容哈希}；以及文字相同但排版不同的文件（内容哈希）
+        self.texts = {}
+        self.near_duplicates = set()
+        # 在受监控的工作进程中被隔离的内容，{内容哈希: 隔离记录}
+        self.quarantined = {}
+
+    def content_hash(self, pdf_path):
+        """
+        返回PDF的内容哈希（同一文件在本进程中只计算一次，见extract_cache.content_hash；
+        已预读到内存的直接用内存中的内容计算）
+        """
+        digest = content_hash(pdf_path, _buffers.get(str(pdf_path)))
+        self.digests[str(pdf_path)] = digest
+        return digest
+
+    def _satisfied(self, document, stop):
+        """
+        已解析的部分是否足够：已解析到最后一页，或满足停止条件
+        """
+        if document is None:
+            return False
+        if document['complete']:
+            return True
+        return stop is not None and stop(pages_to_text(document['pages']))
+
+    def get_pages(self, pdf_path, stop=None):
+        """
+        获取PDF的每页内容，缓存中的内容不够时接着解析后续页面并写回缓存
+        参数：
+            stop: 停止条件，见extract_pages；为None时需要全部页面
+        """
+        digest = self.content_hash(pdf_path)
+        document = self.cache.get_pages(digest, TEXT_VERSION)
+        if not self._satisfied(document, stop):
+            done = document['pages'] if document is not None else None
+            document = extract_pages(pdf_path, stop=stop, pages=done)
+            self.cache.put_pages(digest, TEXT_VERSION, Path(pdf_path).name, document)
+        return document['pages']
+
+    def get_text(self, pdf_path, stop=None):
+        """
+        获取PDF的整篇文本（指定stop时只保证包含满足停止条件所需的页面）
+        """
+        return pages_to_text(self.get_pages(pdf_path, stop))
+
+    def get_fields(self, pdf_path, kind, version, parse, stop=None, from_pages=False, backend='pdfplumber'):
+        """
+        获取PDF的解析结果，缓存中没有时用parse(整篇文本)解析并写入缓存
+        参数：
+            kind: 解析结果类别，如'nutrition'、'label'
+            version: 解析器版本号，解析逻辑变化时递增，使旧结果失效
+            parse: 解析函数，参数为整篇文本，返回可JSON序列化的字典
+            stop: 停止条件，解析只需要满足该条件的前若干页时提供
+            from_pages: 为True时parse的参数为每页内容列表（包含单词坐标），而不是整篇文本
+            backend: 解析后端，见BACKENDS；pdfium提取的文本不保存在文本库中（重新读取很快），
+                     只缓存解析结果，类别记为'{kind}_pdfium'
+        """
+        if backend != 'pdfplumber':
+            if from_pages:
+                raise ValueError(f"{backend}后端不提供单词坐标")
+            kind = f"{kind}_{backend}"
+        digest = self.content_hash(pdf_path)
+        data = self.cache.get_fields(digest, kind, version)
+        if data is None:
+            if backend != 'pdfplumber':
+                source = read_pdf_text(pdf_path, stop, backend)
+            else:
+                source = self.get_pages(pdf_path, stop) if from_pages else self.get_text(pdf_path, stop)
+
+            # 解析输入与之前的文件完全相同时直接复用其解析结果
+            key = (input_fingerprint(source), kind, version)
+            if key in self.parsed:
+                data = json.loads(self.parsed[key])
+                self.reused.add(digest)
+            else:
+                data = parse(source)
+                self.parsed[key] = json.dumps(data, ensure_ascii=False)
+                text_key = (content_fingerprint(source), kind, version)
+                if self.texts.setdefault(text_key, digest) != digest:
+                    self.near_duplicates.add(digest)
+            self.cache.put_fields(digest, kind, version, data)
+        return data
+
+    def dedup_stats(self):
+        """
+        本次运行的去重统计：文件数、字节相同的重复文件数、复用解析结果的文件数、去重比例，
+        以及文字相同但排版不同（没有复用解析结果）的文件数
+        """
+        files = len(self.digests)
+        byte_duplicates = files - len(set(self.digests.values()))
+        content_duplicates = len(self.reused)
+        return {
+            'files': files,
+            'byte_duplicates': byte_duplicates,
+            'content_duplicates': content_duplicates,
+            'ratio': (byte_duplicates + content_duplicates) / files if files else 0,
+            'near_duplicates': len(self.near_duplicates)
+        }
+
+    def save(self):
+        """
+        提交缓存写入
+        """
+        self.cache.commit()
+
+    def is_quarantined(self, pdf_path):
+        """
+        文件内容是否已被隔离（字节相同的文件共用隔离结果）
+        """
+        return self.digests.get(str(pdf_path)) in self.quarantined
+
+    def build(self, pdf_files, workers=1, stop=None, supervisor=None, prefetch_depth=0):
+        """
+        共享解析阶段：解析缓存中没有（或不够）的PDF并保存
+        参数：
+            pdf_files: PDF文件路径列表（不存在的文件会被跳过）
+            workers: 并行进程数，0或None表示使用全部CPU核心
+            stop: 停止条件，见extract_pages；为None时解析全部页面
+            supervisor: 受监控的工作进程池（supervisor.Supervisor），提供时在其中解析，
+                        超时或超出内存的文件被隔离，不写入缓存（workers参数不再使用）；
+                        隔离按内容哈希记录，字节相同的其他文件也被隔离并记入隔离报告
+            prefetch_depth: 在当前进程中计算内容哈希和顺序解析时预读的文件数，见prefetch
+        """
+        missing = []
+        paths = {}
+        for pdf_path in prefetch(pdf_files, prefetch_depth):
+            if not os.path.exists(pdf_path):
+                continue
+            # 字节相同的文件只解析一次，其余的读取同一份缓存
+            digest = self.content_hash(pdf_path)
+            if digest in self.quarantined and supervisor is not None:
+                supervisor.add_duplicate(self.quarantined[digest], pdf_path)
+                continue
+            if digest in paths:
+                paths[digest].append(pdf_path)
+                continue
+            paths[digest] = [pdf_path]
+            document = self.cache.peek_pages(digest, TEXT_VERSION)
+            if not self._satisfied(document, stop):
+                missing.append((Path(pdf_path), document['pages'] if document else None))
+        if not missing:
+            return
+
+        if workers is None or workers <= 0:
+            workers = os.cpu_count() or 1
+
+        print(f"解析PDF文本，共{len(missing)}个文件需要更新")
+        if supervisor is not None:
+            measure = metrics.enabled()
+            extract = partial(extract_missing, stop)
+            known = len(supervisor.failures)
+            for (pdf_path, _), document in supervisor.map(
+                    partial(metrics.collect, extract) if measure else extract, missing,
+                    describe=lambda item: item[0]):
+                if document is None:
+                    continue
+                if measure:
+                    document, records = document
+                    metrics.merge(records)
+                self.cache.put_pages(self.content_hash(pdf_path), TEXT_VERSION, pdf_path.name, document)
+            for failure in supervisor.failures[known:]:
+                digest = failure['digest']
+                self.quarantined[digest] = failure
+                for duplicate in paths[digest][1:]:
+                    supervisor.add_duplicate(failure, duplicate)
+        elif workers == 1:
+            for pdf_path in prefetch([pdf_path for pdf_path, _ in missing], prefetch_depth):
+                try:
+                    self.get_pages(pdf_path, stop)
+                except Exception as e:
+                    print(f"处理文件 {pdf_path} 时出错: {str(e)}")
+        else:
+            # 开启耗时记录时，工作进程中的记录随结果一起返回
+            measure = metrics.enabled()
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(metrics.collect, extract_pages, pdf_path, True, stop, done)
+                           if measure else executor.submit(extract_pages, pdf_path, True, stop, done)
+                           for pdf_path, done in missing]
+                for (pdf_path, _), future in zip(missing, futures):
+                    try:
+                        document = future.result()
+                        if measure:
+                            document, records = document
+                            metrics.merge(records)
+                        self.cache.put_pages(self.content_hash(pdf_path), TEXT_VERSION,
+                                             pdf_path.name, document)
+                    except Exception as e:
+                        print(f"处理文件 {pdf_path} 时出错: {str(e)}")
+
+        self.save()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='解析DATA/books中的PDF并写入提取缓存')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='并行解析PDF的进程数，0表示使用全部CPU核心（默认1）')
+    parser.add_argument('--prefetch', type=int, default=0,
+                        help='顺序处理时用后台线程预读后面N个PDF到内存，读取等待与解析重叠（适用于网络存储，默认0不预读）')
+    args = parser.parse_args()
+
+    store = PdfTextStore()
+    store.build(sorted(Path("DATA/books").glob("*.pdf")), workers=args.workers, prefetch_depth=args.prefetch)
+    print_stats(store.cache.stats())
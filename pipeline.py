@@ -0,0 +1,315 @@
+import argparse
+import ast
+import hashlib
+import importlib
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from extract_cache import content_hash
+from manifest import pdf_fingerprint
+from result_store import RESULTS, load_table, save_result, save_table
+
+# 各阶段的输出（DataFrame，Arrow文件）和输入指纹的保存位置
+PIPELINE_DIR = 'result/pipeline'
+
+# 最后统一保存的结果（Arrow文件和导出的Excel）：{结果名: 提供数据的阶段}
+RESULT_OUTPUTS = {
+    'result1': 'task1_1',
+    'result2': 'task1_4'
+}
+
+
+@lru_cache(maxsize=None)
+def pdf_sources():
+    """
+    DATA/books中所有PDF的指纹
+    """
+    fingerprints = {pdf_file.name: pdf_fingerprint(pdf_file)
+                    for pdf_file in sorted(Path('DATA/books').glob('*.pdf'))}
+    return json.dumps(fingerprints, ensure_ascii=False, sort_keys=True)
+
+
+def data_sources():
+    """
+    data.xlsx和所有PDF的指纹
+    """
+    return content_hash('DATA/data.xlsx') + pdf_sources()
+
+
+def frame_digest(df):
+    """
+    DataFrame内容（包括列名和行索引）的哈希
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(column) for column in df.columns], ensure_ascii=False).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def as_read_back(df):
+    """
+    把阶段的输出整理为写入Excel再读回时的样子：空字符串读回为缺失值，全部为数字的文本列
+    （如登记年份）读回为数值列，没有缺失值且全部为整数的小数列读回为整数列。
+    下游脚本（统计缺失数量、按年份作图等）都是按读回的数据编写的
+    """
+    df = df.replace('', np.nan)
+    for column in df.columns:
+        values = df[column]
+        if values.dtype.kind == 'f':
+            if values.notna().all() and (values == values.round()).all():
+                df[column] = values.astype('int64')
+            continue
+        if values.dtype.kind in 'biucmM' or not values.notna().any():
+            continue
+        numbers = pd.to_numeric(values, errors='coerce')
+        if numbers.notna().sum() == values.notna().sum():
+            df[column] = numbers
+    return df
+
+
+def local_imports(module):
+    """
+    返回module及其直接或间接导入的本项目模块（同目录下的.py文件），按模块名排序。
+    包括函数中延迟导入的模块，每次调用时重新读取源代码（watch模式下修改导入后立即生效）
+    """
+    directory = Path(__file__).parent
+    found = set()
+    pending = [module]
+    while pending:
+        name = pending.pop()
+        if name in found:
+            continue
+        found.add(name)
+        tree = ast.parse((directory / f"{name}.py").read_bytes())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names = [node.module]
+            else:
+                continue
+            for imported in names:
+                imported = imported.split('.')[0]
+                if (directory / f"{imported}.py").exists():
+                    pending.append(imported)
+    return sorted(found)
+
+
+class Stage:
+    """
+    流水线中的一个阶段：对应一个脚本的主函数，上游阶段的输出（DataFrame）按顺序作为参数传入
+    """
+
+    def __init__(self, name, module, func, deps=(), code=(), outputs=(), sources=None, kwargs=None):
+        """
+        参数：
+            name: 阶段名
+            module, func: 模块名和函数名，执行时才导入（缺少某个阶段需要的包不影响其他阶段）
+            deps: 上游阶段名
+            code: 除module及其导入的本项目模块（见local_imports）外，其他影响结果的模块
+                  （如通过importlib按名称导入的模块），与它们的源代码一起计入输入指纹
+            outputs: 阶段生成的文件（图表等），文件缺失时即使输入未变化也重新执行
+            sources: 返回外部输入（PDF、data.xlsx）指纹的函数
+            kwargs: 调用函数时的其他参数
+        """
+        self.name = name
+        self.module = module
+        self.func = func
+        self.deps = list(deps)
+        self.code = list(code)
+        self.outputs = list(outputs)
+        self.sources = sources
+        self.kwargs = kwargs or {}
+
+    def fingerprint(self, dep_digests):
+        """
+        输入指纹：源代码（module及其导入的所有本项目模块）、上游阶段的输出和外部输入
+        """
+        digest = hashlib.sha256()
+        modules = set(local_imports(self.module))
+        for module in self.code:
+            modules.update(local_imports(module))
+        for module in sorted(modules):
+            digest.update(module.encode('utf-8'))
+            digest.update((Path(__file__).parent / f"{module}.py").read_bytes())
+        for dep_digest in dep_digests:
+            digest.update(dep_digest.encode('ascii'))
+        if self.sources is not None:
+            digest.update(self.sources().encode('utf-8'))
+        return digest.hexdigest()
+
+    def call(self, *args):
+        func = getattr(importlib.import_module(self.module), self.func)
+        return func(*args, **self.kwargs)
+
+
+def default_stages(workers=1):
+    """
+    task1_1到task3的各个阶段
+    """
+    return [
+        Stage('task1_1', 'task1_1', 'process_all_pdfs', sources=pdf_sources, kwargs={'workers': workers, 'save': False}),
+        Stage('task1_2', 'task1_2', 'process_all_files', sources=data_sources,
+              kwargs={'workers': workers, 'save': False}),
+        Stage('task1_3', 'task1_3', 'add_population_category', deps=['task1_2']),
+        Stage('task1_4', 'task1_4', 'add_registration_info', deps=['task1_3']),
+        Stage('task2_1', 'task2_1', 'analyze_approval_trends', deps=['task1_4'],
+              outputs=['result/approval_trends.png']),
+        Stage('task2_2', 'task2_2', 'create_sunburst_chart', deps=['task1_4'],
+              outputs=['result/sunburst_chart.html']),
+        Stage('task2_3', 'task2_3', 'analyze_product_categories', deps=['task1_4'],
+              outputs=['result/product_categories.png']),
+        Stage('task2_4', 'task2_4', 'analyze_fat_protein_distribution', deps=['task1_1'],
+              outputs=['result/fat_protein_distribution.png']),
+        Stage('task2_5', 'task2_5', 'create_word_cloud', deps=['task1_4'],
+              outputs=['result/wordcloud.png', 'result/word_frequencies.txt']),
+        Stage('task3', 'task3', 'main', deps=['task1_4', 'task1_1'])
+    ]
+
+
+class Pipeline:
+    """
+    按依赖关系依次执行各阶段，阶段之间在内存中传递DataFrame，结果和Excel只在最后保存一次。
+    每个阶段的输入指纹（源代码、上游输出、外部输入）与上次相同且输出文件都在时跳过该阶段，
+    其输出从上次保存的结果中读取（只在下游阶段需要时读取）
+    """
+
+    def __init__(self, stages, directory=PIPELINE_DIR):
+        self.stages = {stage.name: stage for stage in stages}
+        self.directory = Path(directory)
+        self.state_path = self.directory / 'state.json'
+        self.results = {}
+
+    def resolve(self, targets=None):
+        """
+        返回执行targets（为None时为全部阶段）需要的阶段，按依赖顺序排列
+        """
+        order = []
+
+        def visit(name, path=()):
+            if name not in self.stages:
+                raise ValueError(f"未知的阶段: {name}")
+            if name in path:
+                raise ValueError(f"阶段之间存在循环依赖: {' -> '.join(path + (name,))}")
+            if name in order:
+                return
+            for dep in self.stages[name].deps:
+                visit(dep, path + (name,))
+            order.append(name)
+
+        for name in targets or self.stages:
+            visit(name)
+        return order
+
+    def _load_state(self):
+        if not self.state_path.exists():
+            return {}
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp_path = self.state_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, self.state_path)
+
+    def _frame_path(self, name):
+        return self.directory / f"{name}.arrow"
+
+    def _output(self, name):
+        """
+        阶段的输出：本次执行的结果，或上次保存的结果
+        """
+        if name not in self.results:
+            path = self._frame_path(name)
+            self.results[name] = load_table(path) if path.exists() else None
+        return self.results[name]
+
+    def _up_to_date(self, stage, record, inputs):
+        if record is None or record['inputs'] != inputs:
+            return False
+        if record['frame'] and not self._frame_path(stage.name).exists():
+            return False
+        return all(os.path.exists(path) for path in stage.outputs)
+
+    def run(self, targets=None, force=False):
+        """
+        执行阶段
+        参数：
+            targets: 要执行的阶段名列表（连同其上游阶段），为None时执行全部阶段
+            force: 为True时忽略输入指纹，全部重新执行
+        返回：
+            {'ran': 执行的阶段, 'skipped': 跳过的阶段, 'failed': 出错的阶段}
+        """
+        state = self._load_state()
+        summary = {'ran': [], 'skipped': [], 'failed': []}
+
+        for name in self.resolve(targets):
+            stage = self.stages[name]
+            failed_deps = [dep for dep in stage.deps if dep in summary['failed']]
+            if failed_deps:
+                print(f"\n[{name}] 上游阶段{'、'.join(failed_deps)}出错，跳过")
+                summary['failed'].append(name)
+                continue
+
+            inputs = stage.fingerprint([state[dep]['output'] for dep in stage.deps])
+            if not force and self._up_to_date(stage, state.get(name), inputs):
+                print(f"\n[{name}] 输入未变化，跳过")
+                summary['skipped'].append(name)
+                continue
+
+            print(f"\n[{name}] 开始执行")
+            try:
+                # 传入副本，阶段内对DataFrame的修改不影响上游阶段保存的结果
+                args = [self._output(dep).copy() for dep in stage.deps]
+                result = stage.call(*args)
+            except Exception as e:
+                print(f"[{name}] 执行出错: {type(e).__name__}: {str(e)}")
+                summary['failed'].append(name)
+                state.pop(name, None)
+                self._save_state(state)
+                continue
+
+            if isinstance(result, pd.DataFrame):
+                # 与保存再读回的数据一致，下游阶段的结果与分别运行各脚本时相同，
+                # 跳过该阶段时从Arrow文件读取的输出也与本次相同
+                save_table(as_read_back(result), self._frame_path(name))
+                result = self.results[name] = load_table(self._frame_path(name))
+                state[name] = {'inputs': inputs, 'output': frame_digest(result), 'frame': True}
+            else:
+                state[name] = {'inputs': inputs, 'output': inputs, 'frame': False}
+            summary['ran'].append(name)
+            self._save_state(state)
+
+        self.write_results(summary)
+        print(f"\n执行{len(summary['ran'])}个阶段，跳过{len(summary['skipped'])}个，"
+              f"出错{len(summary['failed'])}个")
+        return summary
+
+    def write_results(self, summary):
+        """
+        保存结果并导出Excel：提供数据的阶段本次执行过，或结果文件不存在时保存
+        """
+        for result_name, name in RESULT_OUTPUTS.items():
+            exists = all(os.path.exists(path) for path in RESULTS[result_name])
+            if name not in summary['ran'] and (name not in summary['skipped'] or exists):
+                continue
+            df = self._output(name)
+            if df is not None:
+                save_result(df, result_name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='按依赖关系执行task1_1到task3，阶段之间在内存中传递数据')
+    parser.add_argument('targets', nargs='*',
+                        help='只执行这些阶段（连同其上游阶段），如task2_1；默认执行全部阶段')
+    parser.add_argument('--force', action='store_true', help='忽略上次的结果，全部重新执行')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='task1_1、task1_2并行解析PDF的进程数，0表示使用全部CPU核心（默认1）')
+    args = parser.parse_args()
+
+    Pipeline(default_stages(args.workers)).run(args.targets or None, force=args.force)
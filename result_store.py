@@ -0,0 +1,164 @@
+import argparse
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+# 结果的规范格式：Arrow IPC文件（不压缩，读取时可以内存映射）；xlsx只作为导出文件
+RESULTS = {
+    'result1': ('result/result1.arrow', 'result/result1.xlsx'),
+    'result2': ('result/result2.arrow', 'result/result2.xlsx')
+}
+
+# 已知列的类型，其余列（如result1的各营养成分）按数据推断
+COLUMN_TYPES = {
+    '企业名称': pa.string(),
+    '产品名称': pa.string(),
+    '注册证号': pa.string(),
+    '有效期至': pa.timestamp('us'),
+    '产品类别': pa.dictionary(pa.int32(), pa.string()),
+    '组织状态': pa.string(),
+    '适用人群': pa.string(),
+    '适用人群类别': pa.dictionary(pa.int32(), pa.string()),
+    '产品来源': pa.dictionary(pa.int32(), pa.string()),
+    '登记年份': pa.int64()
+}
+
+
+def to_table(df):
+    """
+    把DataFrame转换为带类型的Arrow表：空字符串视为缺失值（与写入Excel再读回一致），
+    已知列转换为COLUMN_TYPES中的类型，产品来源等取值很少的列用字典（分类）编码
+    """
+    df = df.replace('', np.nan)
+    fields = []
+    for column in df.columns:
+        values = df[column]
+        arrow_type = COLUMN_TYPES.get(column)
+        if arrow_type is None:
+            fields.append(pa.field(column, pa.Array.from_pandas(values).type))
+            continue
+        if pa.types.is_dictionary(arrow_type):
+            values = values.astype('category')
+        elif pa.types.is_timestamp(arrow_type):
+            values = pd.to_datetime(values, errors='coerce')
+        elif pa.types.is_integer(arrow_type):
+            numbers = pd.to_numeric(values, errors='coerce')
+            bad = values.notna() & (numbers.isna() | (numbers != numbers.round()))
+            if bad.any():
+                raise ValueError(f"{column}列有{bad.sum()}个值不是整数，如: {values[bad].iloc[0]}")
+            values = numbers
+        elif values.notna().any():
+            values = values.astype('str')
+        df[column] = values
+        fields.append(pa.field(column, arrow_type))
+    return pa.Table.from_pandas(df, schema=pa.schema(fields), preserve_index=False)
+
+
+def write_arrow(table, path):
+    """
+    把Arrow表写入IPC文件（先写临时文件再替换，中断时不会留下不完整的文件）
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix('.tmp')
+    with pa.OSFile(str(temp_path), 'wb') as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(temp_path, path)
+
+
+def open_arrow(path):
+    """
+    内存映射打开Arrow IPC文件，返回Arrow表（数据在访问时才从文件读入，没有额外的复制）
+    """
+    return ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+
+
+def save_table(df, path):
+    """
+    把DataFrame保存为Arrow IPC文件（类型见to_table）
+    """
+    write_arrow(to_table(df), path)
+
+
+def load_table(path, columns=None, categorical=False):
+    """
+    内存映射读取Arrow IPC文件
+    参数：
+        columns: 只读取这些列，None表示全部
+        categorical: 为True时字典编码的列保留为category类型，否则还原为文本列（与读取Excel一致）
+    """
+    table = open_arrow(path)
+    if columns is not None:
+        table = table.select(columns)
+    df = table.to_pandas()
+    if not categorical:
+        for column in df.columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].astype('str')
+    return df
+
+
+def result_exists(name):
+    return any(os.path.exists(path) for path in RESULTS[name])
+
+
+def load_result(name, columns=None, categorical=False):
+    """
+    读取结果（result1或result2）：优先读取Arrow文件；只有xlsx时（如之前版本生成的结果）读取xlsx
+    """
+    arrow_path, excel_path = RESULTS[name]
+    if os.path.exists(arrow_path):
+        return load_table(arrow_path, columns, categorical)
+    print(f"没有找到{arrow_path}，读取{excel_path}")
+    return pd.read_excel(excel_path, usecols=columns)
+
+
+def save_result(df, name, excel=True):
+    """
+    保存结果：Arrow文件是规范格式，excel为True时同时导出xlsx
+    """
+    arrow_path, excel_path = RESULTS[name]
+    save_table(df, arrow_path)
+    print(f"结果已保存到: {arrow_path}")
+    if excel:
+        export_excel(name, df)
+
+
+def export_excel(name, df=None):
+    """
+    把结果导出为xlsx，df为None时从Arrow文件读取
+    """
+    arrow_path, excel_path = RESULTS[name]
+    if df is None:
+        df = load_table(arrow_path)
+    df.to_excel(excel_path, index=False)
+    print(f"结果已导出到: {excel_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='查看或导出result1、result2')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    schema_parser = subparsers.add_parser('schema', help='显示Arrow文件的列类型和行数')
+    export_parser = subparsers.add_parser('export', help='从Arrow文件重新导出xlsx')
+    for subparser in (schema_parser, export_parser):
+        subparser.add_argument('names', nargs='*', help=f"{'、'.join(RESULTS)}，默认为全部")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in RESULTS]
+    if unknown:
+        parser.error(f"未知的结果: {', '.join(unknown)}")
+
+    for name in args.names or RESULTS:
+        arrow_path = RESULTS[name][0]
+        if not os.path.exists(arrow_path):
+            print(f"没有找到{arrow_path}")
+            continue
+        if args.command == 'schema':
+            table = open_arrow(arrow_path)
+            print(f"{arrow_path}: {table.num_rows}行")
+            print(table.schema)
+        else:
+            export_excel(name)
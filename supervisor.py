@@ -0,0 +1,285 @@
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from pathlib import Path
+from extract_cache import content_hash
+
+try:
+    import resource
+except ImportError:
+    # Windows没有resource，只按轮询到的常驻内存限制
+    resource = None
+
+# 被隔离文件的报告
+QUARANTINE_PATH = 'result/quarantine.json'
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _statm(pid, field):
+    try:
+        with open(f"/proc/{pid}/statm", 'r') as f:
+            return int(f.read().split()[field]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def process_rss(pid):
+    """
+    读取进程当前的常驻内存（字节），读取失败时返回0
+    """
+    return _statm(pid, 1)
+
+
+def limit_address_space(memory_limit):
+    """
+    在工作进程中设置地址空间上限（RLIMIT_AS）：启动后（已导入处理函数所需的库）的地址空间再加memory_limit，
+    超出时分配内存立即失败（MemoryError），不必等到下一次轮询
+    """
+    if resource is None or not memory_limit:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = _statm('self', 0) + memory_limit
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def _worker(func, conn, memory_limit=None):
+    """
+    工作进程：启动完成后发送'ready'，然后逐个接收任务并返回结果，收到None时退出。
+    失败时返回(原因, 错误信息)，原因为'memory'（超出地址空间上限）或'error'
+    """
+    limit_address_space(memory_limit)
+    conn.send('ready')
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        index, item = task
+        try:
+            conn.send((index, True, func(item)))
+        except MemoryError:
+            conn.send((index, False, ('memory', f"内存超过{memory_limit // 1048576}MB（地址空间上限）")))
+        except Exception as e:
+            conn.send((index, False, ('error', f"{type(e).__name__}: {str(e)}")))
+
+
+class Supervisor:
+    """
+    受监控的工作进程池：每个文件在工作进程中处理，超过时间上限或内存上限的文件
+    会被终止处理（结束并替换该工作进程）并记录到隔离报告中，其他文件继续处理。
+    工作进程以forkserver（没有时用spawn）方式启动，不继承主进程中已加载的库（pyarrow、sqlite等）的
+    线程和锁；内存上限既由工作进程的地址空间上限（RLIMIT_AS）保证，也定期检查常驻内存
+    """
+
+    def __init__(self, workers=1, timeout=None, memory_limit_mb=None, poll_interval=0.1):
+        """
+        参数：
+            workers: 工作进程数，0或None表示使用全部CPU核心
+            timeout: 每个文件的处理时间上限（秒），None表示不限制
+            memory_limit_mb: 每个工作进程的内存上限（MB）：地址空间最多比启动时增加这么多，常驻内存也不超过，
+                             None表示不限制
+            poll_interval: 检查时间和内存的间隔（秒）
+        """
+        self.workers = workers if workers and workers > 0 else (os.cpu_count() or 1)
+        self.timeout = timeout
+        self.memory_limit = memory_limit_mb * 1048576 if memory_limit_mb else None
+        self.poll_interval = poll_interval
+        self.failures = []
+        # 本次运行处理过的文件，保存报告时这些文件在之前报告中的记录被本次的结果取代
+        self.attempted = set()
+        methods = multiprocessing.get_all_start_methods()
+        self.context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+    def _start(self, func):
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(target=_worker, args=(func, child_conn, self.memory_limit), daemon=True)
+        process.start()
+        child_conn.close()
+        return {'process': process, 'conn': parent_conn, 'task': None, 'start': 0, 'peak_rss': 0}
+
+    def _ready(self, slot):
+        """
+        等待工作进程启动完成（导入处理函数所需的库），导入时间不计入第一个文件的处理时间
+        """
+        try:
+            slot['conn'].recv()
+        except (EOFError, OSError):
+            raise RuntimeError(f"工作进程启动失败（退出码{slot['process'].exitcode}）")
+        return slot
+
+    def _stop(self, slot, kill=False):
+        if kill:
+            slot['process'].kill()
+        else:
+            try:
+                slot['conn'].send(None)
+            except OSError:
+                pass
+        slot['process'].join()
+        slot['conn'].close()
+
+    def _fail(self, slot, reason, message, describe):
+        _, item = slot['task']
+        path = Path(describe(item))
+        self.failures.append({
+            'file': path.name,
+            'path': str(path),
+            'digest': content_hash(path) if path.exists() else None,
+            'reason': reason,
+            'message': message,
+            'elapsed_s': round(time.perf_counter() - slot['start'], 3),
+            'peak_rss_mb': round(slot['peak_rss'] / 1048576, 1)
+        })
+        print(f"隔离文件 {path.name}：{message}")
+
+    def add_duplicate(self, failure, path):
+        """
+        把与被隔离文件内容相同的另一个文件记入隔离报告（不再单独处理）
+        """
+        path = Path(path)
+        self.attempted.add(str(path))
+        self.failures.append(dict(failure, file=path.name, path=str(path), duplicate_of=failure['file']))
+        print(f"隔离文件 {path.name}：与{failure['file']}内容相同")
+
+    def map(self, func, items, describe=lambda item: item):
+        """
+        按items的顺序返回(项目, 结果)，被终止或出错的项目结果为None
+        参数：
+            func: 处理函数（模块级函数或functools.partial），参数为一个项目
+            items: 项目列表
+            describe: 返回项目对应的文件路径，用于隔离报告
+        """
+        items = list(items)
+        self.attempted.update(str(Path(describe(item))) for item in items)
+        pending = deque(enumerate(items))
+        slots = [self._start(func) for _ in range(min(self.workers, len(items)))]
+        for slot in slots:
+            self._ready(slot)
+        results = {}
+        next_index = 0
+
+        try:
+            while next_index < len(items):
+                # 给空闲的工作进程分配任务
+                for slot in slots:
+                    if slot['task'] is None and pending:
+                        slot['task'] = pending.popleft()
+                        slot['start'] = time.perf_counter()
+                        slot['peak_rss'] = 0
+                        slot['conn'].send(slot['task'])
+
+                busy = [slot for slot in slots if slot['task'] is not None]
+                ready = wait([slot['conn'] for slot in busy], timeout=self.poll_interval)
+                for i, slot in enumerate(slots):
+                    if slot['task'] is None:
+                        continue
+                    index = slot['task'][0]
+
+                    if slot['conn'] in ready:
+                        try:
+                            _, ok, value = slot['conn'].recv()
+                        except (EOFError, OSError):
+                            # 工作进程异常退出（如被系统终止、解析库崩溃）
+                            self._fail(slot, 'crash', f"工作进程异常退出（退出码{slot['process'].exitcode}）",
+                                       describe)
+                            results[index] = None
+                            self._stop(slot, kill=True)
+                            slots[i] = self._ready(self._start(func))
+                            continue
+                        results[index] = value if ok else None
+                        if not ok:
+                            reason, message = value
+                            self._fail(slot, reason, message, describe)
+                            if reason == 'memory':
+                                # 分配失败后工作进程的状态不可靠，替换该工作进程
+                                self._stop(slot, kill=True)
+                                slots[i] = self._ready(self._start(func))
+                                continue
+                        slot['task'] = None
+                        continue
+
+                    # 检查时间和内存是否超过上限
+                    slot['peak_rss'] = max(slot['peak_rss'], process_rss(slot['process'].pid))
+                    elapsed = time.perf_counter() - slot['start']
+                    if self.timeout is not None and elapsed > self.timeout:
+                        reason, message = 'timeout', f"处理超过{self.timeout}秒"
+                    elif self.memory_limit is not None and slot['peak_rss'] > self.memory_limit:
+                        reason, message = 'memory', f"内存超过{self.memory_limit // 1048576}MB"
+                    else:
+                        continue
+                    self._fail(slot, reason, message, describe)
+                    results[index] = None
+                    self._stop(slot, kill=True)
+                    slots[i] = self._ready(self._start(func))
+
+                # 按原顺序返回已完成的结果
+                while next_index in results:
+                    yield items[next_index], results.pop(next_index)
+                    next_index += 1
+        finally:
+            for slot in slots:
+                self._stop(slot, kill=slot['task'] is not None)
+
+    def save_report(self, path=QUARANTINE_PATH):
+        """
+        保存隔离报告：本次处理过的文件以本次的结果为准（重新处理成功的从报告中删除），
+        其他文件（如另一个任务隔离的文件）在之前报告中的记录保留
+        """
+        kept = [failure for failure in load_report(path) if failure['path'] not in self.attempted]
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(kept + self.failures, f, ensure_ascii=False, indent=1)
+
+
+def load_report(path=QUARANTINE_PATH):
+    """
+    读取隔离报告，没有报告时返回空列表
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_quarantine(path=QUARANTINE_PATH):
+    """
+    之前的运行中隔离的内容，{内容哈希: 隔离记录}
+    """
+    return {failure['digest']: failure for failure in load_report(path) if failure.get('digest')}
+
+
+def quarantined_files(items, path=QUARANTINE_PATH):
+    """
+    items中内容在之前的运行中被隔离的文件（包括字节相同的其他文件），返回路径字符串的集合
+    """
+    quarantine = load_quarantine(path)
+    # 没有隔离记录时不计算内容哈希
+    if not quarantine:
+        return set()
+    return {str(item) for item in items if os.path.exists(item) and content_hash(item) in quarantine}
+
+
+def skip_quarantined(items, process, empty, path=QUARANTINE_PATH):
+    """
+    不受监控地处理文件时跳过之前被隔离的文件（见quarantined_files），按items的顺序返回结果
+    参数：
+        items: 文件路径列表
+        process: 处理函数，参数为没有被隔离的文件列表，按顺序返回（或逐个生成）每个文件的结果
+        empty: 返回被跳过的文件的结果的函数
+    """
+    skipped = quarantined_files(items, path)
+    results = iter(process([item for item in items if str(item) not in skipped]))
+    for item in items:
+        if str(item) in skipped:
+            print(f"跳过之前被隔离的文件 {Path(item).name}（见{path}，指定时间或内存上限时重新尝试）")
+            yield empty()
+        else:
+            yield next(results)
@@ -1,8 +1,18 @@
-import pdfplumber
 import pandas as pd
 import os
-import re
+import argparse
+import metrics
+from batch_runner import ShardRunner
+from supervisor import QUARANTINE_PATH, Supervisor, quarantined_files, skip_quarantined
+from work_queue import WorkQueue
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
+from extract_cache import print_stats
+from manifest import load_manifest, save_manifest, pdf_fingerprint, diff_fingerprints, print_changes
+from nutrient_matrix import MATRIX_PATH, NutrientMatrix, parse_nutrient_rows, parse_nutrient_words
+from pdf_text import PdfTextStore, prefetch, print_dedup_stats, read_pdf_text, read_region_words, region_words
+from result_store import load_result, result_exists, save_result
 
 # 定义需要提取的营养成分及其单位，使用严格匹配
 NUTRIENTS = [
@@ -16,6 +26,16 @@ NUTRIENTS = [
     ('磷', 'mg', ['磷', '磷(mg)'])
 ]
 
+# 营养成分解析器的版本号，解析逻辑变化时递增，使提取缓存中的旧结果失效
+NUTRITION_PARSER_VERSION = 2
+
+# 解析结果中保存整张营养成分表的键（不写入result1）
+TABLE_KEY = '营养成分表'
+
+# 营养成分表区域的开始和结束标记（按坐标解析时使用）
+TABLE_START = '营养成分表'
+TABLE_ENDS = ('】', '备注')
+
 
 def clean_text(text):
     """
@@ -24,136 +44,482 @@ def clean_text(text):
     return ' '.join(text.split())
 
 
-def find_value_for_100kJ(text_lines, nutrient_name, match_texts):
+def build_alias_index(nutrients):
     """
-    在文本行中查找特定营养成分每100kJ的值
+    预先建立营养成分别名的查找表，供单遍解析营养成分表使用
+    参数：
+        nutrients: 营养成分列表，格式同NUTRIENTS
+    返回：
+        dict: {'aliases': {别名: [列名, ...]}, 'max_len': 最长别名长度, 'tokens': {行首词: [列名, ...]}}
+    """
+    aliases = {}
+    for nutrient, unit, match_texts in nutrients:
+        key = f"{nutrient}({unit})"
+        for text in match_texts:
+            aliases.setdefault(text, []).append(key)
+
+    return {
+        'aliases': aliases,
+        'max_len': max((len(text) for text in aliases), default=0),
+        'tokens': {}  # 行首词的匹配结果缓存，同一种写法只匹配一次
+    }
+
+
+def match_nutrients(token, alias_index):
+    """
+    返回行首词所匹配的营养成分列名（行首词包含某个别名即视为匹配）
+    只查找行首词中长度不超过最长别名的子串，耗时与营养成分的数量无关
+    """
+    keys = alias_index['tokens'].get(token)
+    if keys is None:
+        keys = []
+        aliases = alias_index['aliases']
+        for start in range(len(token)):
+            for end in range(start + 1, min(len(token), start + alias_index['max_len']) + 1):
+                for key in aliases.get(token[start:end], ()):
+                    if key not in keys:
+                        keys.append(key)
+        alias_index['tokens'][token] = keys
+    return keys
+
+
+# 默认营养成分列表的查找表
+NUTRIENT_ALIAS_INDEX = build_alias_index(NUTRIENTS)
+
+
+def parse_nutrient_table(text_lines, nutrients=NUTRIENTS, alias_index=None):
+    """
+    单遍解析营养成分表，一次取出所有营养成分每100kJ的值
     处理两种不同的表格格式：
     1. 营养成分 每100g 每100mL 每100kJ
     2. 营养成分 每100g 每100kJ 每份
+    参数：
+        text_lines: 营养成分表部分的文本行
+        nutrients: 需要提取的营养成分列表，格式同NUTRIENTS
+        alias_index: build_alias_index(nutrients)的结果，为None时自动建立
+    返回：
+        dict: {列名: 每100kJ的值}，没找到的为0
     """
-    try:
-        # 找到表头行（包含"每100kJ"的行）
-        header_idx = -1
-        for i, line in enumerate(text_lines):
-            if '每100kJ' in line:
-                header_idx = i
-                break
+    if alias_index is None:
+        alias_index = NUTRIENT_ALIAS_INDEX if nutrients is NUTRIENTS else build_alias_index(nutrients)
+
+    result = {f"{nutrient}({unit})": 0 for nutrient, unit, _ in nutrients}
+
+    # 找到表头行（包含"每100kJ"的行），确定"每100kJ"的位置
+    header_idx = -1
+    for i, line in enumerate(text_lines):
+        if '每100kJ' in line:
+            header_idx = i
+            break
+
+    if header_idx == -1:
+        return result
+
+    header_parts = clean_text(text_lines[header_idx]).split()
+    if '每100kJ' not in header_parts:
+        print("提取营养成分时出错: 表头中没有单独的'每100kJ'列")
+        return result
+    kj_col_idx = header_parts.index('每100kJ')
+
+    # 在表头行之后逐行匹配，每个营养成分取第一个能解析出数值的行
+    pending = set(result)
+    for line in text_lines[header_idx + 1:]:
+        parts = line.split()
+        if not parts:  # 跳过空行
+            continue
+
+        keys = [key for key in match_nutrients(parts[0], alias_index) if key in pending]
+        if not keys:
+            continue
+
+        try:
+            # 使用"每100kJ"列的索引获取对应的值
+            value = float(parts[kj_col_idx])
+        except (IndexError, ValueError):
+            continue
+
+        for key in keys:
+            result[key] = value
+            pending.discard(key)
+        if not pending:
+            break
 
-        if header_idx == -1:
-            return 0
+    return result
 
-        # 获取表头行，确定"每100kJ"的位置
-        header = clean_text(text_lines[header_idx])
-        header_parts = header.split()
-        kj_col_idx = header_parts.index('每100kJ')
 
-        # 在表头行之后的行中查找目标营养成分
-        for i in range(header_idx + 1, len(text_lines)):
-            line = clean_text(text_lines[i])
-            if not line:  # 跳过空行
-                continue
+def find_value_for_100kJ(text_lines, nutrient_name, match_texts):
+    """
+    在文本行中查找特定营养成分每100kJ的值
+    （单个营养成分的查询，批量提取请使用parse_nutrient_table）
+    """
+    return parse_nutrient_table(text_lines, [(nutrient_name, '', match_texts)])[f"{nutrient_name}()"]
+
+
+def nutrition_table_found(all_text):
+    """
+    停止条件：已读到营养成分表及其结束标记（'】'或'备注'），后面的页面不需要再解析
+    """
+    in_table = False
+    for line in all_text.split('\n'):
+        if '营养成分表' in line:
+            in_table = True
+            continue
+
+        if in_table and ('】' in line or '备注' in line):
+            return True
+
+    return False
+
+
+def nutrition_table_lines(all_text):
+    """
+    取出营养成分表部分的文本行（"营养成分表"之后，到'】'或'备注'为止）
+    """
+    table_lines = []
+    in_table = False
+    for line in all_text.split('\n'):
+        # 开始标记
+        if '营养成分表' in line:
+            in_table = True
+            continue
+
+        # 结束标记
+        if in_table and ('】' in line or '备注' in line):
+            break
 
-            parts = line.split()
-            if not parts:  # 跳过空行
+        if in_table:
+            table_lines.append(line)
+
+    return table_lines
+
+
+def parse_nutrition_text(all_text):
+    """
+    从PDF整篇文本中解析营养成分数据
+    返回：
+        dict: {列名: 每100kJ的值}，另有TABLE_KEY键保存整张营养成分表（见parse_nutrient_rows）
+    """
+    result = {f"{nutrient}({unit})": 0 for nutrient, unit, _ in NUTRIENTS}
+
+    # 寻找营养成分表部分
+    table_lines = nutrition_table_lines(all_text)
+
+    # 单遍解析营养成分表，一次取出所有营养成分
+    if table_lines:
+        result.update(parse_nutrient_table(table_lines))
+
+    # 同时保留整张表的所有行，用于生成营养成分矩阵
+    result[TABLE_KEY] = parse_nutrient_rows(table_lines)
+
+    return result
+
+
+def parse_nutrition_words(pages_words):
+    """
+    按单词坐标解析营养成分表区域，返回格式同parse_nutrition_text
+    参数：
+        pages_words: 每页营养成分表区域内的单词坐标列表
+    """
+    result = {f"{nutrient}({unit})": 0 for nutrient, unit, _ in NUTRIENTS}
+
+    table = parse_nutrient_words(pages_words)
+    if '每100kJ' in table['bases']:
+        # 每个营养成分取第一个有每100kJ数值的行
+        kj_col_idx = table['bases'].index('每100kJ')
+        pending = set(result)
+        for name, row in table['rows'].items():
+            if row[kj_col_idx] is None:
                 continue
+            for key in match_nutrients(name, NUTRIENT_ALIAS_INDEX):
+                if key in pending:
+                    result[key] = row[kj_col_idx]
+                    pending.discard(key)
+            if not pending:
+                break
 
-            # 检查是否匹配目标营养成分
-            if any(text in parts[0] for text in match_texts):
-                try:
-                    # 使用"每100kJ"列的索引获取对应的值
-                    value = float(parts[kj_col_idx])
-                    return value
-                except (IndexError, ValueError):
-                    continue
+    result[TABLE_KEY] = table
+    return result
 
-    except Exception as e:
-        print(f"提取{nutrient_name}值时出错: {str(e)}")
 
-    return 0
+def parse_nutrition_pages(pages):
+    """
+    从共享文本库中已保存的每页单词坐标里取出营养成分表区域并解析
+    """
+    return parse_nutrition_words(region_words(pages, TABLE_START, TABLE_ENDS))
 
 
-def extract_nutrition_data(pdf_path):
+def extract_nutrition_data(pdf_path, store=None, table_mode='text', backend='pdfplumber'):
     """
     从PDF文件中提取营养成分数据
+    参数：
+        pdf_path: PDF文件路径
+        store: 共享文本库（PdfTextStore），为None时直接解析PDF
+        table_mode: 'text'按整页文本的行解析营养成分表；
+                    'coords'按单词坐标解析，不使用文本库时只对营养成分表所在的区域做布局分析
+        backend: 解析后端（见pdf_text.BACKENDS），默认使用完整布局分析的pdfplumber；
+                 'pdfium'只读取文本流，只能用于'text'方式
     """
-    result = {f"{nutrient}({unit})": 0 for nutrient, unit, _ in NUTRIENTS}
+    if table_mode == 'coords' and backend != 'pdfplumber':
+        raise ValueError("按单词坐标解析营养成分表需要pdfplumber后端")
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            all_text = ''
-            for page in pdf.pages:
-                all_text += page.extract_text() + '\n'
-
-            text_lines = all_text.split('\n')
-
-            # 寻找营养成分表部分
-            table_lines = []
-            in_table = False
-            for i, line in enumerate(text_lines):
-                # 开始标记
-                if '营养成分表' in line:
-                    in_table = True
-                    continue
-
-                # 结束标记
-                if in_table and ('】' in line or '备注' in line):
-                    break
-
-                if in_table:
-                    table_lines.append(line)
-
-            # 处理每个营养成分
-            if table_lines:
-                for nutrient, unit, match_texts in NUTRIENTS:
-                    value = find_value_for_100kJ(table_lines, nutrient, match_texts)
-                    result[f"{nutrient}({unit})"] = value
+        if table_mode == 'coords':
+            parse = metrics.timed(pdf_path, 'parse_s', parse_nutrition_pages if store is not None
+                                  else parse_nutrition_words)
+            if store is not None:
+                return store.get_fields(pdf_path, 'nutrition_coords', NUTRITION_PARSER_VERSION,
+                                        parse, stop=nutrition_table_found, from_pages=True)
+
+            return parse(read_region_words(pdf_path, TABLE_START, TABLE_ENDS))
+
+        parse = metrics.timed(pdf_path, 'parse_s', parse_nutrition_text)
+        if store is not None:
+            return store.get_fields(pdf_path, 'nutrition', NUTRITION_PARSER_VERSION,
+                                    parse, stop=nutrition_table_found, backend=backend)
+
+        return parse(read_pdf_text(pdf_path, stop=nutrition_table_found, backend=backend))
 
     except Exception as e:
         print(f"处理文件 {pdf_path} 时出错: {str(e)}")
 
-    return result
+    return {f"{nutrient}({unit})": 0 for nutrient, unit, _ in NUTRIENTS}
 
 
-def process_all_pdfs():
+def iter_nutrition_data(pdf_files, workers=1, store=None, table_mode='text', supervisor=None,
+                        prefetch_depth=0):
+    """
+    按pdf_files的顺序依次返回每个文件的营养成分数据
+    参数：
+        pdf_files: PDF文件路径列表
+        workers: 并行进程数，1表示在当前进程中顺序处理，0或None表示使用全部CPU核心
+        store: 共享文本库，提供时先由文本库统一（并行）解析PDF，再从文本库读取文本
+        table_mode: 营养成分表的解析方式，见extract_nutrition_data
+        supervisor: 受监控的工作进程池（supervisor.Supervisor），提供时PDF在其中解析，
+                    超时或超出内存的文件被隔离，结果按没有找到营养成分处理；
+                    不提供时跳过之前的运行中被隔离的文件（见supervisor.skip_quarantined）
+        prefetch_depth: 在当前进程中顺序处理时预读的文件数（pdf_text.prefetch），多进程并行时不使用
+    """
+    empty = {f"{nutrient}({unit})": 0 for nutrient, unit, _ in NUTRIENTS}
+
+    if supervisor is None:
+        yield from skip_quarantined(pdf_files, partial(_iter_nutrition_data, workers=workers, store=store,
+                                                       table_mode=table_mode, prefetch_depth=prefetch_depth),
+                                    lambda: dict(empty))
+    else:
+        yield from _iter_nutrition_data(pdf_files, workers, store, table_mode, supervisor, prefetch_depth)
+
+
+def _iter_nutrition_data(pdf_files, workers=1, store=None, table_mode='text', supervisor=None,
+                         prefetch_depth=0):
+    empty = {f"{nutrient}({unit})": 0 for nutrient, unit, _ in NUTRIENTS}
+
+    if store is not None:
+        store.build(pdf_files, workers, stop=nutrition_table_found, supervisor=supervisor,
+                    prefetch_depth=prefetch_depth)
+        for pdf_file in pdf_files:
+            # 被隔离的内容（包括字节相同的其他文件）不在当前进程中解析
+            if store.is_quarantined(pdf_file):
+                yield dict(empty)
+                continue
+            yield extract_nutrition_data(pdf_file, store, table_mode)
+        return
+
+    if supervisor is not None:
+        extract = partial(extract_nutrition_data, table_mode=table_mode)
+        measure = metrics.enabled()
+        for _, nutrition_data in supervisor.map(partial(metrics.collect, extract) if measure else extract,
+                                                pdf_files):
+            if nutrition_data is None:
+                yield dict(empty)
+                continue
+            if measure:
+                nutrition_data, records = nutrition_data
+                metrics.merge(records)
+            yield nutrition_data
+        return
+
+    if workers is None or workers <= 0:
+        workers = os.cpu_count() or 1
+
+    if workers == 1:
+        for pdf_file in prefetch(pdf_files, prefetch_depth):
+            yield extract_nutrition_data(pdf_file, table_mode=table_mode)
+        return
+
+    # 进程池并行解析，executor.map按提交顺序返回结果，保证输出顺序确定
+    extract = partial(extract_nutrition_data, table_mode=table_mode)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if not metrics.enabled():
+            yield from executor.map(extract, pdf_files, chunksize=1)
+            return
+
+        # 开启耗时记录时，工作进程中的记录随结果一起返回
+        for nutrition_data, records in executor.map(partial(metrics.collect, extract),
+                                                    pdf_files, chunksize=1):
+            metrics.merge(records)
+            yield nutrition_data
+
+
+def process_all_pdfs(workers=1, use_store=True, incremental=False, table_mode='text',
+                     record_metrics=False, shard_size=None, timeout=None, memory_limit_mb=None,
+                     queue_mode=None, lease_seconds=600, prefetch_depth=0, save=True):
     """
-    处理所有PDF文件并生成结果Excel
+    处理所有PDF文件并生成result1，返回结果DataFrame（工作队列的工作进程返回None）
+    参数：
+        workers: 并行解析PDF的进程数，1为顺序处理，0表示使用全部CPU核心
+        use_store: 是否使用与task1_2共享的PDF文本库和提取缓存（内容未变的PDF不再解析）
+        incremental: 增量模式，只处理与上次运行相比新增或修改的PDF，并合并到已有的result1
+        table_mode: 营养成分表的解析方式，'text'按文本行，'coords'按单词坐标
+        record_metrics: 记录每个PDF的打开、逐页提取和解析耗时、页数、大小和内存峰值，
+                        保存到result/metrics.jsonl并打印最慢的文件
+        shard_size: 分片大小，提供时每处理完一个分片就把结果写入检查点，崩溃后重新运行从未完成的分片继续
+        timeout: 每个PDF的解析时间上限（秒），与memory_limit_mb任一提供时PDF在受监控的工作进程中解析，
+                 超出上限的PDF被隔离并记录到result/quarantine.json
+        memory_limit_mb: 每个解析进程的内存上限（MB）
+        queue_mode: 多机工作队列模式（队列位于result/queue，多台机器通过共享文件系统协作），
+                    'work'为工作进程：认领并处理PDF，结果写入队列后退出，不生成结果文件；
+                    'merge'为合并步骤：全部PDF处理完后合并各工作进程的结果，生成result1
+        lease_seconds: 工作队列的租约时间（秒），工作进程崩溃后其认领超过这么久即可被接管
+        prefetch_depth: 顺序处理时用后台线程预读的PDF数，读取等待与解析重叠（适用于网络存储）
+        save: 为False时不保存result1（流水线中由pipeline在最后统一保存）
     """
     # 创建结果DataFrame的列名
     columns = ['注册证号'] + [f"{nutrient}({unit})" for nutrient, unit, _ in NUTRIENTS]
 
-    # 获取所有PDF文件路径
+    # 获取所有PDF文件路径（排序，保证结果顺序与文件系统无关）
     pdf_folder = Path("DATA/books")
-    pdf_files = list(pdf_folder.glob("*.pdf"))
+    pdf_files = sorted(pdf_folder.glob("*.pdf"))
+
+    # 增量模式：与上次运行的清单对比，未变化的PDF沿用result1中已有的结果
+    # （计算过的内容哈希在本进程中缓存，文本库解析时不再重复读取文件）
+    fingerprints = None
+    previous = None
+    pending_files = pdf_files
+    if incremental:
+        fingerprints = {pdf_file.stem: pdf_fingerprint(pdf_file) for pdf_file in pdf_files}
+        last_fingerprints = load_manifest('task1_1')
+        if last_fingerprints is None or not result_exists('result1'):
+            print("没有上次运行的记录，执行全量处理")
+        else:
+            changes = diff_fingerprints(last_fingerprints, fingerprints)
+            print_changes(changes)
+            previous = load_result('result1')
+            previous = previous[previous['注册证号'].isin(changes['unchanged'])]
+            pending = set(changes['added'] + changes['modified'])
+            pending_files = [pdf_file for pdf_file in pdf_files if pdf_file.stem in pending]
 
     # 处理每个PDF文件
     results = []
-    total_files = len(pdf_files)
+    tables = {}
+    total_files = len(pending_files)
 
     print(f"开始处理PDF文件，共{total_files}个文件")
-    for i, pdf_file in enumerate(pdf_files, 1):
+    if record_metrics:
+        metrics.enable()
+    # 工作队列中的工作进程不使用共享文本库（SQLite不适合多台机器通过共享文件系统同时写入）
+    store = PdfTextStore() if use_store and queue_mode != 'work' else None
+    supervisor = None
+    if timeout or memory_limit_mb:
+        supervisor = Supervisor(workers, timeout, memory_limit_mb)
+    runner = None
+    queue = None
+    if queue_mode is not None:
+        queue = WorkQueue('task1_1', pending_files, key=lambda pdf_file: pdf_file.name,
+                          config=[table_mode, NUTRITION_PARSER_VERSION], lease_seconds=lease_seconds)
+        if queue_mode == 'work':
+            count = queue.work(partial(extract_nutrition_data, table_mode=table_mode))
+            print(f"\n本工作进程处理了{count}个文件，全部完成后运行 --queue merge 生成结果")
+            return
+        remaining = queue.remaining()
+        if remaining:
+            print(f"还有{len(remaining)}个文件没有处理完，请先运行工作进程（--queue work）")
+            return
+        nutrition_iter = queue.records()
+    elif shard_size:
+        def process_shard(shard_files):
+            shard_results = list(iter_nutrition_data(shard_files, workers, store, table_mode, supervisor,
+                                                     prefetch_depth))
+            if store is not None:
+                store.save()
+            return shard_results
+
+        runner = ShardRunner('task1_1', pending_files, shard_size, key=lambda pdf_file: pdf_file.name,
+                             config=[table_mode, NUTRITION_PARSER_VERSION])
+        runner.run(process_shard)
+        nutrition_iter = runner.records()
+    else:
+        nutrition_iter = iter_nutrition_data(pending_files, workers, store, table_mode, supervisor,
+                                             prefetch_depth)
+    for i, (pdf_file, nutrition_data) in enumerate(zip(pending_files, nutrition_iter), 1):
         print(f"正在处理: {pdf_file.name} ({i}/{total_files})")
 
         # 从文件名获取注册证号
         reg_number = pdf_file.stem
 
-        # 提取营养成分数据
-        nutrition_data = extract_nutrition_data(pdf_file)
-
-        # 添加注册证号
+        # 添加注册证号，整张营养成分表单独保存
         nutrition_data['注册证号'] = reg_number
+        tables[reg_number] = nutrition_data.pop(TABLE_KEY, None)
 
         # 将结果添加到列表中
         results.append(nutrition_data)
 
-    # 创建DataFrame
-    df = pd.DataFrame(results)
-
-    # 重新排列列顺序
-    df = df[columns]
-
-    # 保存到Excel文件
-    df.to_excel('result/result1.xlsx', index=False)
-    print(f"\n结果已保存到: result/result1.xlsx")
+    if store is not None:
+        store.save()
+        print("\n提取缓存统计：")
+        print_stats(store.cache.stats())
+        print_dedup_stats(store.dedup_stats())
+
+    if supervisor is not None:
+        supervisor.save_report()
+        print(f"\n隔离文件数: {len(supervisor.failures)}，报告已保存到: {QUARANTINE_PATH}")
+
+    if record_metrics:
+        metrics.save()
+        print(f"\n耗时记录已保存到: {metrics.METRICS_PATH}")
+        metrics.print_slowest()
+
+    # 创建DataFrame，并重新排列列顺序
+    df = pd.DataFrame(results, columns=columns)
+
+    # 全部营养成分的矩阵（所有计量基准列，没有数据的为NaN）
+    matrix = NutrientMatrix.from_tables(tables)
+
+    # 增量模式下合并上次的结果，行顺序与全量处理一致
+    if previous is not None:
+        reg_numbers = [pdf_file.stem for pdf_file in pdf_files]
+        df = pd.concat([previous[columns], df], ignore_index=True) if results else previous[columns]
+        df = df.set_index('注册证号').loc[reg_numbers].reset_index()
+        previous_matrix = NutrientMatrix.load()
+        if previous_matrix is not None:
+            matrix = previous_matrix.merge(matrix, reg_numbers)
+            # 释放旧文件的内存映射，之后才能替换该文件（Windows）
+            del previous_matrix
+        else:
+            print(f"没有找到{MATRIX_PATH}，营养成分矩阵中只包含本次处理的产品")
+            matrix = matrix.select(reg_numbers)
+
+    # 保存结果（Arrow文件，并导出Excel）
+    if save:
+        print()
+        save_result(df, 'result1')
+    matrix.save()
+    print(f"营养成分矩阵已保存到: {MATRIX_PATH}（{len(matrix.nutrients)}种营养成分，"
+          f"计量基准: {'、'.join(matrix.bases)}）")
+    # 清单：使用文本库时各PDF的内容哈希在解析时已经算好，直接复用；不使用文本库的全量运行
+    # 不计算内容哈希，删除清单中的记录（下次增量运行执行全量处理）
+    if fingerprints is None and store is not None:
+        fingerprints = {pdf_file.stem: pdf_fingerprint(pdf_file) for pdf_file in pdf_files}
+    # 被隔离（或因之前被隔离而跳过）的文件不记入清单，下次增量运行时重新处理
+    if fingerprints is not None and queue is None:
+        quarantined = ([failure['path'] for failure in supervisor.failures] if supervisor is not None
+                       else quarantined_files(pending_files))
+        for path in quarantined:
+            fingerprints.pop(Path(path).stem, None)
+    save_manifest('task1_1', fingerprints)
+    if runner is not None:
+        runner.clear()
+    if queue is not None:
+        queue.clear()
 
     # 找出蛋白质含量最高的三种特医食品
     # 输出注册证号、能量、脂肪、碳水化合物、蛋白质、钠、氯、钾、磷
@@ -168,8 +534,40 @@ def process_all_pdfs():
         print(f"{row['注册证号']}\t{row['能量(kJ)']}\t{row['脂肪(g)']}\t{row['碳水化合物(g)']}\t{row['蛋白质(g)']}\t{row['钠(mg)']}\t{row['氯(mg)']}\t{row['钾(mg)']}\t{row['磷(mg)']}")
     
     print("\n")
+    return df
     
 
 
 if __name__ == "__main__":
-    process_all_pdfs()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='从PDF中提取营养成分数据')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='并行解析PDF的进程数，0表示使用全部CPU核心（默认1）')
+    parser.add_argument('--no-store', action='store_true',
+                        help='不使用共享PDF文本库和提取缓存，直接解析每个PDF')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量模式：只处理新增或修改的PDF，并合并到已有结果中')
+    parser.add_argument('--metrics', action='store_true',
+                        help='记录每个PDF的各阶段耗时和内存峰值，保存到result/metrics.jsonl')
+    parser.add_argument('--shard-size', type=int, default=None,
+                        help='分片大小：每处理完这么多个PDF就保存检查点，中断后重新运行从未完成的分片继续')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='每个PDF的解析时间上限（秒），超时的PDF被隔离，记录到result/quarantine.json')
+    parser.add_argument('--memory-limit', type=int, default=None,
+                        help='每个解析进程的内存上限（MB），超出的PDF被隔离')
+    parser.add_argument('--prefetch', type=int, default=0,
+                        help='顺序处理时用后台线程预读后面N个PDF到内存，读取等待与解析重叠（适用于网络存储，默认0不预读）')
+    parser.add_argument('--queue', choices=['work', 'merge'], default=None,
+                        help='多机工作队列模式（队列位于result/queue，可放在共享文件系统上）：'
+                             'work启动一个工作进程认领并处理PDF，merge在全部完成后合并结果')
+    parser.add_argument('--lease', type=float, default=600,
+                        help='工作队列的租约时间（秒），工作进程崩溃后其认领的PDF超过这么久可被接管（默认600）')
+    parser.add_argument('--table-mode', choices=['text', 'coords'], default='text',
+                        help='营养成分表的解析方式：text按文本行（默认），'
+                             'coords按单词坐标对应表头列，只对表格区域做布局分析')
+    args = parser.parse_args()
+
+    process_all_pdfs(workers=args.workers, use_store=not args.no_store,
+                     incremental=args.incremental, table_mode=args.table_mode,
+                     record_metrics=args.metrics, shard_size=args.shard_size,
+                     timeout=args.timeout, memory_limit_mb=args.memory_limit,
+                     queue_mode=args.queue, lease_seconds=args.lease, prefetch_depth=args.prefetch)
\ No newline at end of file
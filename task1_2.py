@@ -1,11 +1,68 @@
-import pdfplumber
 import pandas as pd
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
+from extract_cache import print_stats
+from batch_runner import ShardRunner
+from extract_log import ExtractLog, MemoryLog
+from manifest import load_manifest, save_manifest, row_fingerprint, diff_fingerprints, print_changes
+from pdf_text import BACKENDS, PdfTextStore, prefetch, print_dedup_stats, read_pdf_text
+from result_store import load_result, result_exists, save_result
+from supervisor import QUARANTINE_PATH, Supervisor, quarantined_files, skip_quarantined
+from work_queue import WorkQueue
+
+# 标签解析器的版本号，解析逻辑变化时递增，使提取缓存中的旧结果失效
+LABEL_PARSER_VERSION = 2
+
+# 需要提取的标签
+INFO_LABELS = ['【产品类别】', '【组织状态】', '【适用人群】']
+
+# 标签对应的结果列名
+INFO_FIELDS = [label.strip('【】') for label in INFO_LABELS]
+
+# 数字、英文与汉字之间的空格（见normalize_label）
+CJK_SPACING = re.compile(r'(?<=[0-9A-Za-z]) +(?=[\u3400-\u9fff\uf900-\ufaff])'
+                         r'|(?<=[\u3400-\u9fff\uf900-\ufaff]) +(?=[0-9A-Za-z])')
+
+
+def split_labels(text):
+    """
+    一遍扫描，把文本切分为{【标签】: 内容}，所有标签（配料表、营养成分表、保质期、贮存条件等）一次取出
+    每个标签的内容到下一个'【'为止；最后一个标签之后没有'【'时，内容到该行结束
+    内容已去除首尾空白和末尾的句号；同一标签出现多次时取第一次出现的内容
+    耗时与文本长度成正比，与需要的标签数量无关
+    """
+    sections = {}
+    start = text.find('【')
+    while start != -1:
+        next_start = text.find('【', start + 1)
+        limit = next_start if next_start != -1 else len(text)
+
+        # 标签的结束符必须在下一个'【'之前，否则不是完整的标签
+        close = text.find('】', start + 1, limit)
+        if close != -1:
+            label = text[start:close + 1]
+            content_start = close + 1
+            if next_start == -1:
+                line_end = text.find('\n', content_start)
+                content = text[content_start:line_end if line_end != -1 else len(text)]
+            else:
+                content = text[content_start:next_start]
+            if label not in sections:
+                sections[label] = content.strip().rstrip('。').rstrip('.')
+
+        start = next_start
+
+    return sections
 
 
 def extract_label_content(text, label):
     """
     从文本中提取指定标签的内容，并清理标点符号
+    （单个标签的查询，提取多个标签请使用split_labels）
     参数：
         text: PDF文本内容
         label: 要提取的标签（如【产品类别】）
@@ -13,112 +70,308 @@ def extract_label_content(text, label):
         清理后的内容，如果没找到返回空字符串
     """
     try:
-        # 查找标签的起始位置
-        start_idx = text.find(label)
-        if start_idx == -1:
-            return ''
-
-        # 从标签后开始查找内容
-        content_start = start_idx + len(label)
-
-        # 查找下一个【标签】作为内容结束
-        next_label = text.find('【', content_start)
-
-        # 提取内容
-        if next_label == -1:
-            # 如果没有找到下一个标签，查找下一个换行
-            line_end = text.find('\n', content_start)
-            if line_end == -1:
-                content = text[content_start:].strip()
-            else:
-                content = text[content_start:line_end].strip()
-        else:
-            content = text[content_start:next_label].strip()
-
-        # 清理内容，去除句号
-        content = content.rstrip('。').rstrip('.')
-
-        return content
+        return split_labels(text).get(label, '')
 
     except Exception as e:
         print(f"提取{label}时出错: {str(e)}")
         return ''
 
 
-def extract_pdf_info(pdf_path):
+def labels_found(text):
+    """
+    停止条件：所有标签都已出现，且每个标签后面都已有下一个【标签】（内容已完整），
+    后面的页面不需要再解析
+    """
+    sections = list(split_labels(text))
+    return all(label in sections and sections.index(label) < len(sections) - 1
+               for label in INFO_LABELS)
+
+
+def normalize_label(content):
+    """
+    去掉数字、英文与汉字之间的空格：pdfplumber按字符间距、pdfium按文本流决定是否输出空格，
+    同一内容可能是“10 岁以上”或“10岁以上”，统一后两种后端的结果相同，
+    task3、task2_5按“10岁以上”等写法匹配时也不受影响
+    """
+    return CJK_SPACING.sub('', content)
+
+
+def parse_pdf_info(text):
+    """
+    从PDF整篇文本中解析INFO_LABELS中的各个标签（产品类别、组织状态、适用人群）
+    """
+    sections = split_labels(text)
+    return {field: normalize_label(sections.get(label, '')) for label, field in zip(INFO_LABELS, INFO_FIELDS)}
+
+
+def extract_pdf_info(pdf_path, store=None, log=None, backend='pdfplumber'):
     """
     从PDF文件中提取产品类别、组织状态和适用人群信息
+    参数：
+        pdf_path: PDF文件路径
+        store: 共享文本库（PdfTextStore），为None时直接解析PDF
+        log: 提取结果日志（ExtractLog，工作进程中为ExtractLog.queue_sink()），
+             为None时直接追加到result/info.txt和result/info.jsonl
+        backend: 解析后端（见pdf_text.BACKENDS），标签只需要纯文本，可以使用更快的'pdfium'；
+                 使用的后端记录在日志中
     """
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            # 提取所有页面文本
-            text = ''
-            for page in pdf.pages:
-                text += page.extract_text() + '\n'
-
-            # 提取三个标签的内容
-            category = extract_label_content(text, '【产品类别】')
-            state = extract_label_content(text, '【组织状态】')
-            population = extract_label_content(text, '【适用人群】')
-
-            # 记录提取结果到日志
-            log_entry = f"文件: {pdf_path.name}\n"
-            log_entry += f"产品类别: {category}\n"
-            log_entry += f"组织状态: {state}\n"
-            log_entry += f"适用人群: {population}\n"
-            log_entry += "-" * 50 + "\n"
-
-            with open('result/info.txt', 'a', encoding='utf-8') as f:
-                f.write(log_entry)
-
-            return {
-                '产品类别': category,
-                '组织状态': state,
-                '适用人群': population
-            }
+        # 提取三个标签的内容（使用文本库时优先读取缓存的解析结果）
+        if store is not None:
+            info = store.get_fields(pdf_path, 'label', LABEL_PARSER_VERSION, parse_pdf_info,
+                                    stop=labels_found, backend=backend)
+        else:
+            info = parse_pdf_info(read_pdf_text(pdf_path, stop=labels_found, backend=backend))
+
+        # 记录提取结果到日志
+        log_record(log, pdf_path, info, backend)
+
+        return info
 
     except Exception as e:
         print(f"处理文件 {pdf_path} 时出错: {str(e)}")
-        return {'产品类别': '', '组织状态': '', '适用人群': ''}
+        return {field: '' for field in INFO_FIELDS}
 
 
-def process_all_files():
+def log_record(log, pdf_path, info, backend):
     """
-    处理所有文件并生成结果
+    把一个文件的提取结果写入日志，log为None时直接追加到日志文件
     """
-    # 创建新的info.txt文件
-    with open('result/info.txt', 'w', encoding='utf-8') as f:
-        f.write("提取结果日志\n")
-        f.write("=" * 50 + "\n")
+    record = {'文件': pdf_path.name}
+    record.update((field, info[field]) for field in INFO_FIELDS)
+    record['解析后端'] = backend
+    if log is not None:
+        log.write(record)
+    else:
+        with ExtractLog(append=True) as single_log:
+            single_log.write(record)
+
 
+def extract_logged_info(pdf_path, backend='pdfplumber'):
+    """
+    在单独的进程中（工作队列的工作进程、受监控的工作进程）处理一个文件：返回{'info': 标签信息, 'log': 日志记录}，
+    文件缺失或解析出错时没有日志记录（log为None），主进程只写入成功解析的文件的记录
+    """
+    log = MemoryLog()
+    info = extract_pdf_info(pdf_path, log=log, backend=backend)
+    return {'info': info, 'log': log.records[0] if log.records else None}
+
+
+def iter_pdf_info(pdf_files, workers=1, store=None, log=None, prefetch_depth=0, backend='pdfplumber',
+                  supervisor=None):
+    """
+    按pdf_files的顺序依次返回每个文件的标签信息
+    参数：
+        pdf_files: PDF文件路径列表
+        workers: 并行进程数，1表示在当前进程中顺序处理，0或None表示使用全部CPU核心
+        store: 共享文本库，提供时先由文本库统一（并行）解析PDF，再从文本库读取文本
+        log: 提取结果日志（ExtractLog）
+        prefetch_depth: 在当前进程中顺序处理时预读的文件数（pdf_text.prefetch），多进程并行时不使用
+        backend: 解析后端，见extract_pdf_info
+        supervisor: 受监控的工作进程池（supervisor.Supervisor），提供时PDF在其中解析，
+                    超时或超出内存的文件被隔离，标签内容为空；
+                    不提供时跳过之前的运行中被隔离的文件（见supervisor.skip_quarantined）
+    """
+    empty = {field: '' for field in INFO_FIELDS}
+
+    if supervisor is None:
+        yield from skip_quarantined(pdf_files, partial(_iter_pdf_info, workers=workers, store=store, log=log,
+                                                       prefetch_depth=prefetch_depth, backend=backend),
+                                    lambda: dict(empty))
+        return
+
+    total_files = len(pdf_files)
+    if store is not None and backend == 'pdfplumber':
+        store.build(pdf_files, workers, stop=labels_found, supervisor=supervisor, prefetch_depth=prefetch_depth)
+        for i, pdf_path in enumerate(pdf_files, 1):
+            print(f"正在处理: {pdf_path.stem} ({i}/{total_files})")
+            # 被隔离的内容（包括字节相同的其他文件）不在当前进程中解析
+            yield dict(empty) if store.is_quarantined(pdf_path) else extract_pdf_info(pdf_path, store, log, backend)
+        return
+
+    # 不使用文本库（或pdfium后端）时整个文件在受监控的工作进程中处理，日志记录随结果返回
+    for i, (pdf_path, result) in enumerate(
+            supervisor.map(partial(extract_logged_info, backend=backend), pdf_files), 1):
+        print(f"正在处理: {pdf_path.stem} ({i}/{total_files})")
+        if result is None:
+            yield dict(empty)
+            continue
+        if result['log'] is not None and log is not None:
+            log.write(result['log'])
+        yield result['info']
+
+
+def _iter_pdf_info(pdf_files, workers=1, store=None, log=None, prefetch_depth=0, backend='pdfplumber'):
+    total_files = len(pdf_files)
+    if store is not None and backend == 'pdfplumber':
+        # pdfium的文本不保存在文本库中，不需要预先解析
+        store.build(pdf_files, workers, stop=labels_found, prefetch_depth=prefetch_depth)
+
+    if workers is None or workers <= 0:
+        workers = os.cpu_count() or 1
+
+    if store is None and workers > 1:
+        # 进程池并行解析，日志记录经队列交给主进程统一写入
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            extract = partial(extract_pdf_info, log=log.queue_sink() if log is not None else None,
+                              backend=backend)
+            for i, (pdf_path, info) in enumerate(zip(pdf_files, executor.map(extract, pdf_files)), 1):
+                print(f"正在处理: {pdf_path.stem} ({i}/{total_files})")
+                yield info
+        return
+
+    for i, pdf_path in enumerate(prefetch(pdf_files, prefetch_depth), 1):
+        print(f"正在处理: {pdf_path.stem} ({i}/{total_files})")
+
+        # 提取PDF信息
+        yield extract_pdf_info(pdf_path, store, log, backend)
+
+
+def data_fingerprints(df):
+    """
+    data.xlsx中每一行与对应PDF的组合指纹，{注册证号: 指纹}
+    """
+    return {row['注册证号']: row_fingerprint(row, Path(f"DATA/books/{row['注册证号']}.pdf"))
+            for _, row in df.iterrows()}
+
+
+def process_all_files(workers=1, use_store=True, incremental=False, shard_size=None, queue_mode=None,
+                      lease_seconds=600, prefetch_depth=0, backend='pdfplumber', timeout=None,
+                      memory_limit_mb=None, save=True):
+    """
+    处理所有文件并生成结果，返回结果DataFrame（工作队列的工作进程返回None）
+    参数：
+        workers: 并行解析PDF的进程数，0表示使用全部CPU核心
+        use_store: 是否使用与task1_1共享的PDF文本库和提取缓存（内容未变的PDF不再解析）
+        incremental: 增量模式，只处理与上次运行相比新增或修改的产品，并合并到已有的result2
+        shard_size: 分片大小，提供时每处理完一个分片就把结果写入检查点，崩溃后重新运行从未完成的分片继续
+        queue_mode: 多机工作队列模式，'work'为工作进程，'merge'为合并步骤，见task1_1.process_all_pdfs
+        lease_seconds: 工作队列的租约时间（秒）
+        prefetch_depth: 顺序处理时用后台线程预读的PDF数，读取等待与解析重叠（适用于网络存储）
+        backend: 解析后端，'pdfplumber'（默认）或只读取文本流、快得多的'pdfium'，见pdf_text.BACKENDS
+        timeout: 每个PDF的解析时间上限（秒），与memory_limit_mb任一提供时PDF在受监控的工作进程中解析，
+                 超出上限的PDF被隔离并记录到result/quarantine.json（见task1_1.process_all_pdfs）
+        memory_limit_mb: 每个解析进程的内存上限（MB）
+        save: 为False时不保存result2（流水线中由pipeline在最后统一保存）
+    """
     # 读取原始数据
     print("读取data.xlsx...")
     df = pd.read_excel('DATA/data.xlsx')
 
-    # 用于存储提取的信息
-    extracted_info = []
+    # 增量模式：与上次运行的清单对比（data.xlsx中的行内容和对应PDF），
+    # 未变化的产品沿用result2中已有的整行结果（包括task1_3、task1_4添加的列）
+    # data.xlsx的原始内容（不增量处理时pending_df就是df，之后会添加提取出的列）
+    data_df = df.copy()
+    fingerprints = None
+    previous = None
+    pending_df = df
+    if incremental:
+        fingerprints = data_fingerprints(data_df)
+        last_fingerprints = load_manifest('task1_2')
+        if last_fingerprints is None or not result_exists('result2'):
+            print("没有上次运行的记录，执行全量处理")
+        else:
+            changes = diff_fingerprints(last_fingerprints, fingerprints)
+            print_changes(changes)
+            previous = load_result('result2')
+            previous = previous[previous['注册证号'].isin(changes['unchanged'])]
+            pending_df = df[~df['注册证号'].isin(changes['unchanged'])].copy()
+
+    pdf_files = [Path(f"DATA/books/{reg_number}.pdf") for reg_number in pending_df['注册证号']]
+
+    # 多机工作队列模式：工作进程只把结果写入队列（日志在合并时统一写入）
+    queue = None
+    if queue_mode is not None:
+        queue = WorkQueue('task1_2', pdf_files, key=lambda pdf_path: pdf_path.name,
+                          config=[LABEL_PARSER_VERSION, backend], lease_seconds=lease_seconds)
+        if queue_mode == 'work':
+            count = queue.work(partial(extract_logged_info, backend=backend))
+            print(f"\n本工作进程处理了{count}个文件，全部完成后运行 --queue merge 生成结果")
+            return
+        remaining = queue.remaining()
+        if remaining:
+            print(f"还有{len(remaining)}个文件没有处理完，请先运行工作进程（--queue work）")
+            return
+
+    # 分片模式：每个分片处理完即写入检查点，崩溃后从未完成的分片继续
+    runner = None
+    if shard_size and queue is None:
+        runner = ShardRunner('task1_2', pdf_files, shard_size, key=lambda pdf_path: pdf_path.name,
+                             config=[LABEL_PARSER_VERSION, backend])
+
+    # 创建新的info.txt和info.jsonl（增量模式或从检查点继续时在原有日志后追加），记录批量写入
+    log = ExtractLog(append=previous is not None or (runner is not None and runner.completed() > 0))
+
+    # 共享文本库：task1_1已解析过的PDF直接复用文本，其余的先统一解析
+    store = PdfTextStore() if use_store else None
+    supervisor = None
+    if timeout or memory_limit_mb:
+        supervisor = Supervisor(workers, timeout, memory_limit_mb)
 
     # 处理每个PDF文件
-    total_files = len(df)
+    total_files = len(pending_df)
     print(f"开始处理PDF文件，共{total_files}个文件")
 
-    for index, row in df.iterrows():
-        reg_number = row['注册证号']
-        pdf_path = Path(f"DATA/books/{reg_number}.pdf")
+    if queue is not None:
+        extracted_info = []
+        for result in queue.records():
+            if result['log'] is not None:
+                log.write(result['log'])
+            extracted_info.append(result['info'])
+    elif runner is not None:
+        def process_shard(shard_files):
+            shard_info = list(iter_pdf_info(shard_files, workers, store, log, prefetch_depth, backend,
+                                            supervisor))
+            log.flush()
+            if store is not None:
+                store.save()
+            return shard_info
 
-        print(f"正在处理: {reg_number} ({index + 1}/{total_files})")
+        runner.run(process_shard)
+        extracted_info = list(runner.records())
+    else:
+        extracted_info = list(iter_pdf_info(pdf_files, workers, store, log, prefetch_depth, backend, supervisor))
+    log.close()
 
-        # 提取PDF信息
-        info = extract_pdf_info(pdf_path)
-        extracted_info.append(info)
+    if store is not None:
+        store.save()
+        print("\n提取缓存统计：")
+        print_stats(store.cache.stats())
+        print_dedup_stats(store.dedup_stats())
+
+    if supervisor is not None:
+        supervisor.save_report()
+        print(f"\n隔离文件数: {len(supervisor.failures)}，报告已保存到: {QUARANTINE_PATH}")
 
     # 将提取的信息添加到DataFrame中
-    for key in ['产品类别', '组织状态', '适用人群']:
-        df[key] = [info[key] for info in extracted_info]
+    for key in INFO_FIELDS:
+        pending_df[key] = [info[key] for info in extracted_info]
+    df = pending_df
+
+    # 增量模式下合并上次的结果，行顺序与data.xlsx一致
+    if previous is not None:
+        position = {reg_number: i for i, reg_number in enumerate(data_df['注册证号'])}
+        df = pd.concat([previous, pending_df], ignore_index=True)
+        df = df.sort_values('注册证号', key=lambda s: s.map(position)).reset_index(drop=True)
 
     # 保存结果
-    df.to_excel('result/result2.xlsx', index=False)
-    print("\n结果已保存到: result/result2.xlsx")
+    if save:
+        print()
+        save_result(df, 'result2')
+    # 清单：使用文本库时PDF的内容哈希在解析时已经算好，直接复用（见task1_1.process_all_pdfs）
+    if fingerprints is None and store is not None:
+        fingerprints = data_fingerprints(data_df)
+    # 被隔离（或因之前被隔离而跳过）的文件不记入清单，下次增量运行时重新处理
+    if fingerprints is not None and queue is None:
+        quarantined = ([failure['path'] for failure in supervisor.failures] if supervisor is not None
+                       else quarantined_files(pdf_files))
+        for path in quarantined:
+            fingerprints.pop(Path(path).stem, None)
+    save_manifest('task1_2', fingerprints)
+    if runner is not None:
+        runner.clear()
+    if queue is not None:
+        queue.clear()
 
     # 打印前5款特医食品的结果
     print("\n前5款特医食品的结果：")
@@ -133,7 +386,36 @@ def process_all_files():
     print(f"缺少产品类别的文件数: {empty_category}")
     print(f"缺少组织状态的文件数: {empty_state}")
     print(f"缺少适用人群的文件数: {empty_population}")
+    return df
 
 
 if __name__ == "__main__":
-    process_all_files()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='从PDF中提取产品类别、组织状态和适用人群')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='并行解析PDF的进程数，0表示使用全部CPU核心（默认1）')
+    parser.add_argument('--no-store', action='store_true',
+                        help='不使用共享PDF文本库和提取缓存，直接解析每个PDF')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量模式：只处理新增或修改的产品，并合并到已有结果中')
+    parser.add_argument('--shard-size', type=int, default=None,
+                        help='分片大小：每处理完这么多个产品就保存检查点，中断后重新运行从未完成的分片继续')
+    parser.add_argument('--prefetch', type=int, default=0,
+                        help='顺序处理时用后台线程预读后面N个PDF到内存，读取等待与解析重叠（适用于网络存储，默认0不预读）')
+    parser.add_argument('--backend', choices=BACKENDS, default='pdfplumber',
+                        help='PDF解析后端：pdfplumber做完整布局分析（默认）；'
+                             'pdfium只读取文本流，快得多（标签内容与pdfplumber相同）')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='每个PDF的解析时间上限（秒），超时的PDF被隔离，记录到result/quarantine.json')
+    parser.add_argument('--memory-limit', type=int, default=None,
+                        help='每个解析进程的内存上限（MB），超出的PDF被隔离')
+    parser.add_argument('--queue', choices=['work', 'merge'], default=None,
+                        help='多机工作队列模式（队列位于result/queue，可放在共享文件系统上）：'
+                             'work启动一个工作进程认领并处理PDF，merge在全部完成后合并结果')
+    parser.add_argument('--lease', type=float, default=600,
+                        help='工作队列的租约时间（秒），工作进程崩溃后其认领的PDF超过这么久可被接管（默认600）')
+    args = parser.parse_args()
+
+    process_all_files(workers=args.workers, use_store=not args.no_store,
+                      incremental=args.incremental, shard_size=args.shard_size,
+                      queue_mode=args.queue, lease_seconds=args.lease, prefetch_depth=args.prefetch,
+                      backend=args.backend, timeout=args.timeout, memory_limit_mb=args.memory_limit)
\ No newline at end of file
@@ -1,48 +1,65 @@
 import pandas as pd
+import argparse
+import re
+import pyarrow as pa
+import pyarrow.compute as pc
+from result_store import load_result, save_result
 
+# 婴儿关键词，合并为一个正则（不区分大小写），用pyarrow的正则（RE2）对整列一次匹配
+INFANT_KEYWORDS = [
+    '婴儿',
+]
+INFANT_PATTERN = '|'.join(re.escape(keyword) for keyword in INFANT_KEYWORDS)
 
-def classify_population(text):
+
+def classify_population(texts):
     """
-    根据适用人群文本判断类别
+    根据适用人群文本判断类别（整列一次处理）
     参数：
-        text: 适用人群文本
+        texts: 适用人群列（Series）
     返回：
-        '特医婴配食品' 或 '1岁以上特医食品'
+        与texts索引相同的Series，值为'特医婴配食品' 或 '1岁以上特医食品'（适用人群为空时为后者）
     """
-    # 定义婴儿关键词
-    infant_keywords = [
-        '婴儿',
-    ]
-
-    # 如果适用人群为空，返回1岁以上特医食品
-    if pd.isna(text):
-        return '1岁以上特医食品'
+    values = pa.array(texts.astype('str'), type=pa.string(), from_pandas=True)
+    is_infant = pc.match_substring_regex(values, INFANT_PATTERN, ignore_case=True)
+    categories = pc.if_else(is_infant.fill_null(False), '特医婴配食品', '1岁以上特医食品')
+    return pd.Series(categories, dtype='str', index=texts.index)
 
-    # 检查是否包含婴儿相关关键词
-    text = str(text).lower()  # 转换为小写，统一处理
-    for keyword in infant_keywords:
-        if keyword in text:
-            return '特医婴配食品'
 
-    return '1岁以上特医食品'
+def add_population_category(df, incremental=False):
+    """
+    为task1_2的结果添加适用人群类别列并打印统计（在传入的DataFrame上修改并返回）
+    参数：
+        df: task1_2的结果
+        incremental: 增量模式，只为还没有适用人群类别的行（task1_2新增或修改的产品）进行分类
+    """
+    # 添加适用人群类别列
+    print("正在进行适用人群分类...")
+    if incremental and '适用人群类别' in df.columns:
+        pending = df['适用人群类别'].isna()
+        print(f"增量模式：需要分类的行数 {pending.sum()}")
+        df.loc[pending, '适用人群类别'] = classify_population(df.loc[pending, '适用人群'])
+    else:
+        df['适用人群类别'] = classify_population(df['适用人群'])
+    return df
 
 
-def process_classification():
+def process_classification(incremental=False):
     """
     处理文件并添加适用人群类别
+    参数：
+        incremental: 增量模式，只为还没有适用人群类别的行（task1_2新增或修改的产品）进行分类
     """
     try:
-        # 读取result2.xlsx
-        print("读取result2.xlsx...")
-        df = pd.read_excel('result/result2.xlsx')
+        # 读取result2
+        print("读取result2...")
+        df = load_result('result2')
 
         # 添加适用人群类别列
-        print("正在进行适用人群分类...")
-        df['适用人群类别'] = df['适用人群'].apply(classify_population)
+        df = add_population_category(df, incremental)
 
         # 保存结果
-        df.to_excel('result/result2.xlsx', index=False)
-        print("结果已保存到result2.xlsx")
+        save_result(df, 'result2')
 
         # 统计两个类别的数量
         category_counts = df['适用人群类别'].value_counts()
@@ -60,4 +77,9 @@ def process_classification():
 
 
 if __name__ == "__main__":
-    process_classification()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='根据适用人群进行分类')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量模式：只处理还没有分类结果的行')
+    args = parser.parse_args()
+
+    process_classification(incremental=args.incremental)
\ No newline at end of file
@@ -1,55 +1,93 @@
 import pandas as pd
+import argparse
+import pyarrow as pa
+import pyarrow.compute as pc
+from result_store import load_result, save_result
 
+# 注册证号的格式：国食注字TY + 4位登记年份 + 4位顺序号（顺序号第一位为5的是进口产品）
+# 用pyarrow的正则（RE2）对整列一次提取，比逐行调用Python的re快一个数量级
+REGISTRATION_PATTERN = r'^\s*国食注字TY(?P<year>\d{4})(?P<sequence>\d{4})\s*$'
 
-def parse_registration_number(reg_number):
+
+def parse_registration_numbers(reg_numbers):
     """
-    解析注册证号，提取产品来源和登记年份
+    解析注册证号，提取产品来源、登记年份和顺序号（整列一次处理）
     参数：
-        reg_number: 注册证号（如：国食注字TY20175001）
+        reg_numbers: 注册证号列（Series，如：国食注字TY20175001）
     返回：
-        tuple: (产品来源, 登记年份)
+        (结果, 格式不正确的注册证号)：结果是与reg_numbers索引相同的DataFrame，
+        列为产品来源、登记年份（Int64）和顺序号（Int64），格式不正确的行为缺失值
     """
-    try:
-        # 找到"TY"的位置，便于准确定位
-        ty_pos = reg_number.find('TY')
-        if ty_pos == -1:
-            return "", ""
-
-        # 提取年份（TY后面的4位）
-        year = reg_number[ty_pos + 2:ty_pos + 6]
-
-        # 提取顺序号第一位（年份后的第一位）
-        first_digit = reg_number[ty_pos + 6]
-
-        # 判断产品来源
-        source = "进口产品" if first_digit == "5" else "国产产品"
-
-        return source, year
-    except:
-        # 如果解析失败，返回空值
-        return "", ""
+    values = pa.array(reg_numbers.astype('str'), type=pa.string(), from_pandas=True)
+    parts = pc.extract_regex(values, REGISTRATION_PATTERN)
+    year = pc.struct_field(parts, 'year')
+    sequence = pc.struct_field(parts, 'sequence')
+    source = pc.if_else(pc.starts_with(sequence, '5'), '进口产品', '国产产品')
+    result = pd.DataFrame({
+        '产品来源': pd.Series(source, dtype='str', index=reg_numbers.index),
+        '登记年份': pc.cast(year, pa.int64()).to_pandas().astype('Int64').set_axis(reg_numbers.index),
+        '顺序号': pc.cast(sequence, pa.int64()).to_pandas().astype('Int64').set_axis(reg_numbers.index)
+    })
+    matched = parts.is_valid().to_numpy(zero_copy_only=False)
+    return result, reg_numbers[~matched]
+
+
+def report_malformed(malformed, limit=10):
+    """
+    一次性打印格式不正确的注册证号（产品来源和登记年份为空）
+    """
+    if malformed.empty:
+        return
+    examples = '、'.join(str(reg_number) for reg_number in malformed.head(limit))
+    print(f"警告：{len(malformed)}个注册证号格式不正确，产品来源和登记年份为空: {examples}"
+          f"{' 等' if len(malformed) > limit else ''}")
 
 
-def process_registration_info():
+def add_registration_info(df, incremental=False):
+    """
+    为task1_2的结果添加产品来源和登记年份列（在传入的DataFrame上修改并返回）
+    参数：
+        df: task1_2的结果
+        incremental: 增量模式，只解析还没有产品来源的行（task1_2新增或修改的产品）
     """
-    处理注册证号信息并更新Excel文件
+    # 解析注册证号
+    print("正在解析注册证号...")
+    if incremental and '产品来源' in df.columns:
+        pending = df['产品来源'].isna()
+        print(f"增量模式：需要解析的行数 {pending.sum()}")
+        # 读回的登记年份可能是小数列（有缺失值时），转为可以包含缺失值的整数列
+        df['登记年份'] = pd.to_numeric(df['登记年份']).astype('Int64')
+    else:
+        pending = pd.Series(True, index=df.index)
+    results, malformed = parse_registration_numbers(df.loc[pending, '注册证号'])
+    report_malformed(malformed)
+
+    # 添加产品来源和登记年份列
+    if pending.all():
+        df['产品来源'] = results['产品来源']
+        df['登记年份'] = results['登记年份']
+    else:
+        df.loc[pending, '产品来源'] = results['产品来源']
+        df.loc[pending, '登记年份'] = results['登记年份']
+    return df
+
+
+def process_registration_info(incremental=False):
+    """
+    处理注册证号信息并更新result2
+    参数：
+        incremental: 增量模式，只解析还没有产品来源的行（task1_2新增或修改的产品）
     """
     try:
-        # 读取result2.xlsx
-        print("读取result2.xlsx...")
-        df = pd.read_excel('result/result2.xlsx')
+        # 读取result2
+        print("读取result2...")
+        df = load_result('result2')
 
         # 解析每个注册证号
-        print("正在解析注册证号...")
-        results = [parse_registration_number(reg_num) for reg_num in df['注册证号']]
-
-        # 添加产品来源和登记年份列
-        df['产品来源'] = [result[0] for result in results]
-        df['登记年份'] = [result[1] for result in results]
+        df = add_registration_info(df, incremental)
 
         # 保存结果
-        df.to_excel('result/result2.xlsx', index=False)
-        print("结果已保存到result2.xlsx")
+        save_result(df, 'result2')
 
         # 统计产品来源
         source_counts = df['产品来源'].value_counts()
@@ -67,4 +105,9 @@ def process_registration_info():
 
 
 if __name__ == "__main__":
-    process_registration_info()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='解析注册证号，添加产品来源和登记年份')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量模式：只处理还没有解析结果的行')
+    args = parser.parse_args()
+
+    process_registration_info(incremental=args.incremental)
\ No newline at end of file
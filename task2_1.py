@@ -1,25 +1,25 @@
-import pandas as pd
+from result_store import load_result
 import matplotlib.pyplot as plt
 import seaborn as sns
+from chart_cache import render_chart
 
+# 图表的样式参数（计入图表输入指纹，修改后重新绘制）
+STYLE = {'font': ['SimHei'], 'figsize': (12, 6), 'dpi': 300, 'title': '特医食品历年获批数量趋势'}
+OUTPUT_PATH = 'result/approval_trends.png'
 
-def analyze_approval_trends():
+
+def plot_approval_trends(stats):
     """
-    分析特医食品获批数量趋势并绘制双折线图
+    绘制双折线图并保存
+    参数：
+        stats: 按年份（行）和产品来源（列）统计的获批数量
     """
-    # 读取数据
-    print("读取result2.xlsx...")
-    df = pd.read_excel('result/result2.xlsx')
-
-    # 按年份和产品来源统计数量
-    stats = df.groupby(['登记年份', '产品来源']).size().unstack(fill_value=0)
-
     # 设置中文字体
-    plt.rcParams['font.sans-serif'] = ['SimHei']  # 用来正常显示中文标签
+    plt.rcParams['font.sans-serif'] = STYLE['font']  # 用来正常显示中文标签
     plt.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
 
     # 创建图形
-    plt.figure(figsize=(12, 6))
+    plt.figure(figsize=STYLE['figsize'])
 
     # 绘制双折线图
     for column in stats.columns:
@@ -34,7 +34,7 @@ def analyze_approval_trends():
                          ha='center')
 
     # 设置图形属性
-    plt.title('特医食品历年获批数量趋势', fontsize=14, pad=20)
+    plt.title(STYLE['title'], fontsize=14, pad=20)
     plt.xlabel('登记年份', fontsize=12)
     plt.ylabel('获批数量', fontsize=12)
     plt.grid(True, linestyle='--', alpha=0.7)
@@ -47,8 +47,26 @@ def analyze_approval_trends():
     plt.tight_layout()
 
     # 保存图形
-    plt.savefig('result/approval_trends.png', dpi=300, bbox_inches='tight')
-    print("趋势图已保存到result/approval_trends.png")
+    plt.savefig(OUTPUT_PATH, dpi=STYLE['dpi'], bbox_inches='tight')
+    print(f"趋势图已保存到{OUTPUT_PATH}")
+
+
+def analyze_approval_trends(df=None):
+    """
+    分析特医食品获批数量趋势并绘制双折线图
+    参数：
+        df: result2的数据，为None时读取result/result2（流水线中由上游阶段直接传入）
+    """
+    # 读取数据
+    if df is None:
+        print("读取result2...")
+        df = load_result('result2')
+
+    # 按年份和产品来源统计数量
+    stats = df.groupby(['登记年份', '产品来源']).size().unstack(fill_value=0)
+
+    # 统计结果和样式与上次相同时不重新绘制
+    render_chart([OUTPUT_PATH], stats, STYLE, lambda: plot_approval_trends(stats), __file__)
 
     # 输出统计数据
     print("\n按年份和产品来源统计的获批数量：")
@@ -1,14 +1,51 @@
-import pandas as pd
+from result_store import load_result
 import plotly.graph_objects as go
+from chart_cache import render_chart
 
+# 图表的样式参数（计入图表输入指纹，修改后重新绘制）
+STYLE = {'title': '特医食品产品来源与适用人群类别分布', 'title_size': 20, 'width': 800, 'height': 800}
+OUTPUT_PATH = 'result/sunburst_chart.html'
 
-def create_sunburst_chart():
+
+def plot_sunburst(labels, parents, values):
+    """
+    绘制旭日图并保存为HTML
+    """
+    # 创建旭日图
+    fig = go.Figure(go.Sunburst(
+        labels=labels,
+        parents=parents,
+        values=values,
+        branchvalues="total",  # 显示实际数值而不是百分比
+    ))
+
+    # 设置图形标题和样式
+    fig.update_layout(
+        title={
+            'text': STYLE['title'],
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'size': STYLE['title_size']}
+        },
+        width=STYLE['width'],
+        height=STYLE['height'],
+    )
+
+    # 保存为HTML文件（交互式）
+    fig.write_html(OUTPUT_PATH)
+    print(f"旭日图已保存到{OUTPUT_PATH}")
+
+
+def create_sunburst_chart(df=None):
     """
     创建旭日图并进行数据分析
+    参数：
+        df: result2的数据，为None时读取result/result2（流水线中由上游阶段直接传入）
     """
     # 读取数据
-    print("读取result2.xlsx...")
-    df = pd.read_excel('result/result2.xlsx')
+    if df is None:
+        print("读取result2...")
+        df = load_result('result2')
 
     # 统计每个组合的数量
     grouped_data = df.groupby(['适用人群类别', '产品来源']).size().reset_index(name='数量')
@@ -35,29 +72,9 @@ def create_sunburst_chart():
         parents.append(row['适用人群类别'])
         values.append(row['数量'])
 
-    # 创建旭日图
-    fig = go.Figure(go.Sunburst(
-        labels=labels,
-        parents=parents,
-        values=values,
-        branchvalues="total",  # 显示实际数值而不是百分比
-    ))
-
-    # 设置图形标题和样式
-    fig.update_layout(
-        title={
-            'text': '特医食品产品来源与适用人群类别分布',
-            'x': 0.5,
-            'xanchor': 'center',
-            'font': {'size': 20}
-        },
-        width=800,
-        height=800,
-    )
-
-    # 保存为HTML文件（交互式）
-    fig.write_html("result/sunburst_chart.html")
-    print("旭日图已保存到result/sunburst_chart.html")
+    # 旭日图的数据和样式与上次相同时不重新绘制
+    render_chart([OUTPUT_PATH], [labels, parents, values], STYLE,
+                 lambda: plot_sunburst(labels, parents, values), __file__)
 
     # 输出统计分析
     print("\n数据统计与分析：")
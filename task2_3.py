@@ -1,28 +1,29 @@
-import pandas as pd
+from result_store import load_result
 import matplotlib.pyplot as plt
 import seaborn as sns
+from chart_cache import render_chart
 
+# 图表的样式参数（计入图表输入指纹，修改后重新绘制）
+STYLE = {'font': ['SimHei'], 'figsize': (12, 6), 'dpi': 300, 'palette': 'husl',
+         'title': '特医食品不同产品类别获批数量分布'}
+OUTPUT_PATH = 'result/product_categories.png'
 
-def analyze_product_categories():
+
+def plot_product_categories(category_counts):
     """
-    分析不同产品类别的获批数量并绘制柱状图
+    绘制柱状图并保存
+    参数：
+        category_counts: 各产品类别的获批数量（降序）
     """
-    # 读取数据
-    print("读取result2.xlsx...")
-    df = pd.read_excel('result/result2.xlsx')
-
-    # 统计产品类别数量并降序排列
-    category_counts = df['产品类别'].value_counts()
-
     # 设置中文字体
-    plt.rcParams['font.sans-serif'] = ['SimHei']  # 用来正常显示中文标签
+    plt.rcParams['font.sans-serif'] = STYLE['font']  # 用来正常显示中文标签
     plt.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
 
     # 创建图形
-    plt.figure(figsize=(12, 6))
+    plt.figure(figsize=STYLE['figsize'])
 
     # 使用自定义颜色绘制柱状图
-    colors = sns.color_palette("husl", len(category_counts))
+    colors = sns.color_palette(STYLE['palette'], len(category_counts))
     bars = plt.bar(range(len(category_counts)), category_counts.values, color=colors)
 
     # 添加数据标签
@@ -33,7 +34,7 @@ def analyze_product_categories():
                  ha='center', va='bottom')
 
     # 设置图形属性
-    plt.title('特医食品不同产品类别获批数量分布', fontsize=14, pad=20)
+    plt.title(STYLE['title'], fontsize=14, pad=20)
     plt.xlabel('产品类别', fontsize=12)
     plt.ylabel('获批数量', fontsize=12)
     plt.grid(True, axis='y', linestyle='--', alpha=0.7)
@@ -45,8 +46,27 @@ def analyze_product_categories():
     plt.tight_layout()
 
     # 保存图形
-    plt.savefig('result/product_categories.png', dpi=300, bbox_inches='tight')
-    print("柱状图已保存到result/product_categories.png")
+    plt.savefig(OUTPUT_PATH, dpi=STYLE['dpi'], bbox_inches='tight')
+    print(f"柱状图已保存到{OUTPUT_PATH}")
+
+
+def analyze_product_categories(df=None):
+    """
+    分析不同产品类别的获批数量并绘制柱状图
+    参数：
+        df: result2的数据，为None时读取result/result2（流水线中由上游阶段直接传入）
+    """
+    # 读取数据
+    if df is None:
+        print("读取result2...")
+        df = load_result('result2')
+
+    # 统计产品类别数量并降序排列
+    category_counts = df['产品类别'].value_counts()
+
+    # 统计结果和样式与上次相同时不重新绘制
+    render_chart([OUTPUT_PATH], category_counts, STYLE, lambda: plot_product_categories(category_counts),
+                 __file__)
 
     # 输出统计分析
     print("\n产品类别统计分析：")
@@ -1,33 +1,38 @@
-import pandas as pd
+from result_store import load_result
 import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
+from chart_cache import render_chart
 
+# 图表的样式参数（计入图表输入指纹，修改后重新绘制）
+STYLE = {'font': ['SimHei'], 'figsize': (12, 6), 'dpi': 300, 'bins': 'auto',
+         'colors': ['skyblue', 'lightcoral'], 'title': '特医食品脂肪和蛋白质含量分布'}
+OUTPUT_PATH = 'result/fat_protein_distribution.png'
 
-def analyze_fat_protein_distribution():
+
+def plot_fat_protein_distribution(values):
     """
-    分析脂肪和蛋白质含量的分布并绘制直方图
+    绘制直方图并保存
+    参数：
+        values: 脂肪(g)和蛋白质(g)两列
     """
-    # 读取数据
-    print("读取result1.xlsx...")
-    df = pd.read_excel('result/result1.xlsx')
-
     # 设置中文字体
-    plt.rcParams['font.sans-serif'] = ['SimHei']  # 用来正常显示中文标签
+    plt.rcParams['font.sans-serif'] = STYLE['font']  # 用来正常显示中文标签
     plt.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
 
     # 创建图形
-    plt.figure(figsize=(12, 6))
+    plt.figure(figsize=STYLE['figsize'])
 
     # 绘制直方图
     # alpha设置透明度，避免完全遮挡
-    plt.hist(df['脂肪(g)'], bins='auto', alpha=0.6, color='skyblue',
+    fat_color, protein_color = STYLE['colors']
+    plt.hist(values['脂肪(g)'], bins=STYLE['bins'], alpha=0.6, color=fat_color,
              label='脂肪含量', edgecolor='black')
-    plt.hist(df['蛋白质(g)'], bins='auto', alpha=0.6, color='lightcoral',
+    plt.hist(values['蛋白质(g)'], bins=STYLE['bins'], alpha=0.6, color=protein_color,
              label='蛋白质含量', edgecolor='black')
 
     # 设置图形属性
-    plt.title('特医食品脂肪和蛋白质含量分布', fontsize=14, pad=20)
+    plt.title(STYLE['title'], fontsize=14, pad=20)
     plt.xlabel('含量 (g/100kJ)', fontsize=12)
     plt.ylabel('频数', fontsize=12)
     plt.grid(True, linestyle='--', alpha=0.7)
@@ -37,8 +42,24 @@ def analyze_fat_protein_distribution():
     plt.tight_layout()
 
     # 保存图形
-    plt.savefig('result/fat_protein_distribution.png', dpi=300, bbox_inches='tight')
-    print("分布图已保存到result/fat_protein_distribution.png")
+    plt.savefig(OUTPUT_PATH, dpi=STYLE['dpi'], bbox_inches='tight')
+    print(f"分布图已保存到{OUTPUT_PATH}")
+
+
+def analyze_fat_protein_distribution(df=None):
+    """
+    分析脂肪和蛋白质含量的分布并绘制直方图
+    参数：
+        df: result1的数据，为None时读取result/result1（流水线中由上游阶段直接传入）
+    """
+    # 读取数据
+    if df is None:
+        print("读取result1...")
+        df = load_result('result1')
+
+    # 直方图的输入与样式与上次相同时不重新绘制
+    values = df[['脂肪(g)', '蛋白质(g)']].reset_index(drop=True)
+    render_chart([OUTPUT_PATH], values, STYLE, lambda: plot_fat_protein_distribution(values), __file__)
 
     # 计算统计指标
     fat_stats = df['脂肪(g)'].describe()
@@ -1,18 +1,63 @@
 import pandas as pd
+from result_store import load_result
 import jieba
 import numpy as np
 from wordcloud import WordCloud
 import matplotlib.pyplot as plt
 import os
+from chart_cache import render_chart
+
+# 词云的样式参数（计入图表输入指纹，修改后重新绘制）
+STYLE = {
+    'wordcloud': {
+        'width': 1200,
+        'height': 800,
+        'background_color': 'white',
+        'max_words': 100,
+        'max_font_size': 200,
+        'min_font_size': 10,
+        'random_state': 42,
+        # 使用Windows系统自带的微软雅黑字体
+        'font_path': r'C:\Windows\Fonts\msyh.ttc',
+        'collocations': False,  # 设置为False防止词语重复
+        'prefer_horizontal': 0.7  # 70%的词横向显示
+    },
+    'figsize': (15, 10),
+    'dpi': 300
+}
+OUTPUT_PATH = 'result/wordcloud.png'
+
+
+def plot_word_cloud(text):
+    """
+    生成词云并保存
+    参数：
+        text: 分词并过滤停用词后的文本（以空格分隔）
+    """
+    # 创建词云对象并生成词云
+    wc = WordCloud(**STYLE['wordcloud'])
+    wc.generate(text)
+
+    # 创建图形
+    plt.figure(figsize=STYLE['figsize'])
+    plt.imshow(wc, interpolation='bilinear')
+    plt.axis('off')  # 不显示坐标轴
+
+    # 保存词云图
+    plt.savefig(OUTPUT_PATH, dpi=STYLE['dpi'], bbox_inches='tight')
+    print(f"词云图已保存到{OUTPUT_PATH}")
 
 
-def create_word_cloud():
+def create_word_cloud(df=None):
     """
     创建并保存词云图，分析适用人群特征
+    参数：
+        df: result2的数据，为None时读取result/result2（流水线中由上游阶段直接传入）
     """
     # 读取数据
-    print("读取result2.xlsx...")
-    df = pd.read_excel('result/result2.xlsx')
+    if df is None:
+        print("读取result2...")
+        df = load_result('result2')
 
     # 添加自定义词组
     custom_words = [
@@ -94,34 +139,8 @@ def create_word_cloud():
     # 将词频系列转换为词频字典，用于生成词云
     words_filtered = ' '.join(words_filtered)
 
-    # 设置字体路径（使用Windows系统自带的微软雅黑字体）
-    font_path = r'C:\Windows\Fonts\msyh.ttc'
-
-    # 创建词云对象
-    wc = WordCloud(
-        width=1200,
-        height=800,
-        background_color='white',
-        max_words=100,
-        max_font_size=200,
-        min_font_size=10,
-        random_state=42,
-        font_path=r'C:\Windows\Fonts\msyh.ttc',
-        collocations=False,  # 设置为False防止词语重复
-        prefer_horizontal=0.7  # 70%的词横向显示
-    )
-
-    # 生成词云
-    wc.generate(words_filtered)
-
-    # 创建图形
-    plt.figure(figsize=(15, 10))
-    plt.imshow(wc, interpolation='bilinear')
-    plt.axis('off')  # 不显示坐标轴
-
-    # 保存词云图
-    plt.savefig('result/wordcloud.png', dpi=300, bbox_inches='tight')
-    print("词云图已保存到result/wordcloud.png")
+    # 分词结果和样式与上次相同时不重新生成词云
+    render_chart([OUTPUT_PATH], words_filtered, STYLE, lambda: plot_word_cloud(words_filtered), __file__)
 
     # 输出词频统计和分析
     print("\n词频统计（top 20）：")
@@ -1,14 +1,17 @@
-import pandas as pd
+from result_store import load_result
 
 
 class MedicalFoodRecommender:
-    def __init__(self):
+    def __init__(self, product_data=None, nutrition_data=None):
         """
         初始化推荐系统，设置所有评分规则
+        参数：
+            product_data, nutrition_data: result2和result1的数据，为None时读取result2和result1
         """
         # 加载数据
-        self.product_data = pd.read_excel('result/result2.xlsx')
-        self.nutrition_data = pd.read_excel('result/result1.xlsx')
+        self.product_data = product_data if product_data is not None else load_result('result2')
+        self.nutrition_data = (nutrition_data if nutrition_data is not None
+                               else load_result('result1'))
 
         # 一、必要条件
         self.age_groups = {
@@ -393,8 +396,8 @@ class MedicalFoodRecommender:
 
         return results
 
-def main():
-    recommender = MedicalFoodRecommender()
+def main(product_data=None, nutrition_data=None):
+    recommender = MedicalFoodRecommender(product_data, nutrition_data)
 
     # 客户1：婴儿、蛋白质过敏
     print("\n处理客户1需求...")
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 各脚本是项目根目录下的独立模块，测试中直接按模块名导入
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
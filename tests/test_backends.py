@@ -0,0 +1,19 @@
+from pathlib import Path
+import pytest
+from pdf_text import read_pdf_text
+from task1_2 import labels_found, normalize_label, parse_pdf_info
+
+BOOKS = sorted((Path(__file__).resolve().parent.parent / 'DATA' / 'books').glob('*.pdf'))
+
+
+def test_normalize_label():
+    assert normalize_label('10 岁以上') == '10岁以上'
+    assert normalize_label('1～10 岁、0～12 月龄') == '1～10岁、0～12月龄'
+    assert normalize_label('含 DHA 的配方 粉状') == '含DHA的配方 粉状'
+
+
+@pytest.mark.skipif(not BOOKS, reason='没有DATA/books')
+@pytest.mark.parametrize('pdf_path', BOOKS, ids=[path.stem for path in BOOKS])
+def test_pdfium_labels_match_pdfplumber(pdf_path):
+    expected = parse_pdf_info(read_pdf_text(pdf_path, labels_found))
+    assert parse_pdf_info(read_pdf_text(pdf_path, labels_found, 'pdfium')) == expected
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+from task1_3 import classify_population
+from task1_4 import add_registration_info, parse_registration_numbers
+
+
+def test_classify_population():
+    texts = pd.Series(['0-12月龄婴儿', '1岁以上人群', np.nan, '', '早产/低出生体重婴儿'], index=[3, 4, 5, 6, 7])
+    categories = classify_population(texts)
+    assert categories.index.tolist() == [3, 4, 5, 6, 7]
+    assert categories.tolist() == ['特医婴配食品', '1岁以上特医食品', '1岁以上特医食品', '1岁以上特医食品',
+                                   '特医婴配食品']
+
+
+def test_parse_registration_numbers():
+    reg_numbers = pd.Series(['国食注字TY20175001', ' 国食注字TY20230022 ', '国食注字TY2023002', np.nan,
+                             'TY20175001'], index=[10, 11, 12, 13, 14])
+    result, malformed = parse_registration_numbers(reg_numbers)
+
+    assert result.index.tolist() == [10, 11, 12, 13, 14]
+    assert result.loc[10].tolist() == ['进口产品', 2017, 5001]
+    assert result.loc[11].tolist() == ['国产产品', 2023, 22]
+    assert result.loc[12:].isna().all().all()
+    assert str(result['登记年份'].dtype) == 'Int64'
+    assert malformed.index.tolist() == [12, 13, 14]
+
+
+def test_add_registration_info_incremental_only_fills_missing_rows():
+    df = pd.DataFrame({
+        '注册证号': ['国食注字TY20175001', '国食注字TY20230022'],
+        '产品来源': ['已有', np.nan],
+        '登记年份': [1999.0, np.nan]
+    })
+    df = add_registration_info(df, incremental=True)
+    assert df['产品来源'].tolist() == ['已有', '国产产品']
+    assert df['登记年份'].tolist() == [1999, 2023]
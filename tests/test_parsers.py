@@ -0,0 +1,92 @@
+from nutrient_matrix import parse_nutrient_rows
+from task1_1 import NUTRIENT_ALIAS_INDEX, build_alias_index, match_nutrients, parse_nutrient_table, \
+    parse_nutrition_text
+from task1_2 import labels_found, parse_pdf_info, split_labels
+
+
+def test_split_labels_takes_content_up_to_next_label():
+    text = '【产品类别】全营养配方食品。\n【组织状态】粉状\n【适用人群】1岁以上人群\n第二行'
+    assert split_labels(text) == {
+        '【产品类别】': '全营养配方食品',
+        '【组织状态】': '粉状',
+        '【适用人群】': '1岁以上人群'
+    }
+
+
+def test_split_labels_skips_unclosed_label_and_keeps_first_occurrence():
+    text = '前言【产品类别 没有结束符【组织状态】液体.【组织状态】粉状'
+    assert split_labels(text) == {'【组织状态】': '液体'}
+
+
+def test_split_labels_without_labels():
+    assert split_labels('') == {}
+    assert split_labels('没有标签的文本】') == {}
+
+
+def test_labels_found_requires_following_label():
+    text = '【产品类别】A\n【组织状态】B\n【适用人群】C'
+    assert not labels_found(text)
+    assert labels_found(text + '\n【配料表】D')
+
+
+def test_parse_pdf_info_missing_labels_are_empty():
+    info = parse_pdf_info('【产品类别】全营养配方食品\n【配料表】水')
+    assert info == {'产品类别': '全营养配方食品', '组织状态': '', '适用人群': ''}
+
+
+def test_match_nutrients_uses_aliases_inside_token():
+    assert match_nutrients('蛋白质（等同物）', NUTRIENT_ALIAS_INDEX) == ['蛋白质(g)']
+    assert match_nutrients('能量(kJ)', NUTRIENT_ALIAS_INDEX) == ['能量(kJ)']
+    assert match_nutrients('维生素A', NUTRIENT_ALIAS_INDEX) == []
+
+
+def test_match_nutrients_shared_alias_matches_every_column():
+    index = build_alias_index([('钠', 'mg', ['钠']), ('钠盐', 'g', ['钠'])])
+    assert match_nutrients('钠', index) == ['钠(mg)', '钠盐(g)']
+
+
+def test_parse_nutrient_table_reads_100kj_column():
+    lines = [
+        '营养成分 每100g 每100kJ 每份',
+        '能量(kJ) 1900 100 400',
+        '蛋白质（等同物）(g) 15.0 0.79 3',
+        '脂肪(g) 20 1.05 4',
+        '钠(mg) 300 15.8 60',
+        '蛋白质(g) 99 99 99'
+    ]
+    result = parse_nutrient_table(lines)
+    assert result['能量(kJ)'] == 100.0
+    assert result['脂肪(g)'] == 1.05
+    # 每个营养成分取第一个能解析出数值的行
+    assert result['蛋白质(g)'] == 0.79
+    assert result['钠(mg)'] == 15.8
+    assert result['碳水化合物(g)'] == 0
+
+
+def test_parse_nutrient_table_other_header_layout():
+    lines = ['营养成分 每100g 每100mL 每100kJ', '能量 400 100 100', '钾 80 20 25']
+    result = parse_nutrient_table(lines)
+    assert result['能量(kJ)'] == 100.0
+    assert result['钾(mg)'] == 25.0
+
+
+def test_parse_nutrient_table_without_header():
+    result = parse_nutrient_table(['能量 100'])
+    assert set(result.values()) == {0}
+
+
+def test_parse_nutrition_text_keeps_full_table():
+    text = '\n'.join([
+        '【营养成分表】',
+        '营养成分表',
+        '营养成分 每100g 每100kJ',
+        '能量(kJ) 1900 100',
+        '维生素B 0.5 0.03',
+        '1',
+        '(mg)',
+        '【配料表】'
+    ])
+    result = parse_nutrition_text(text)
+    assert result['能量(kJ)'] == 100.0
+    assert result['营养成分表'] == parse_nutrient_rows(text.split('\n')[2:7])
+    assert '维生素B1(mg)' in result['营养成分表']['rows']
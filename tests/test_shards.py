@@ -0,0 +1,39 @@
+import pytest
+from batch_runner import ShardRunner
+
+
+def test_shard_runner_resumes_after_failure(tmp_path):
+    items = [f"file{i}" for i in range(5)]
+    calls = []
+
+    def failing(shard):
+        calls.append(list(shard))
+        if 'file2' in shard:
+            raise RuntimeError('crash')
+        return [item.upper() for item in shard]
+
+    runner = ShardRunner('task', items, 2, config=['v1'], directory=tmp_path)
+    with pytest.raises(RuntimeError):
+        runner.run(failing)
+    assert runner.completed() == 1
+
+    calls.clear()
+    runner = ShardRunner('task', items, 2, config=['v1'], directory=tmp_path)
+    runner.run(lambda shard: calls.append(list(shard)) or [item.upper() for item in shard])
+    assert calls == [['file2', 'file3'], ['file4']]
+    assert list(runner.records()) == [item.upper() for item in items]
+
+
+def test_shard_runner_discards_checkpoints_when_config_changes(tmp_path):
+    items = ['a', 'b', 'c']
+    ShardRunner('task', items, 2, config=['v1'], directory=tmp_path).run(lambda shard: shard)
+
+    runner = ShardRunner('task', items, 2, config=['v2'], directory=tmp_path)
+    assert runner.completed() == 0
+
+
+def test_shard_runner_rejects_wrong_result_count(tmp_path):
+    runner = ShardRunner('task', ['a', 'b'], 2, directory=tmp_path)
+    with pytest.raises(ValueError):
+        runner.run(lambda shard: shard[:1])
+    assert runner.completed() == 0
@@ -0,0 +1,42 @@
+import json
+from extract_cache import content_hash
+from supervisor import Supervisor, load_quarantine, skip_quarantined
+
+
+def allocate(megabytes):
+    return len(bytearray(megabytes * 1048576))
+
+
+def test_memory_limit_quarantines_only_the_large_item(tmp_path):
+    supervisor = Supervisor(1, memory_limit_mb=50)
+    results = list(supervisor.map(allocate, [10, 500, 20], describe=lambda n: tmp_path / f"{n}.pdf"))
+    assert [result for _, result in results] == [10485760, None, 20971520]
+    assert [(failure['file'], failure['reason']) for failure in supervisor.failures] == [('500.pdf', 'memory')]
+
+
+def test_report_persists_and_unsupervised_runs_skip_quarantined(tmp_path):
+    report = tmp_path / 'quarantine.json'
+    slow, other, copy = (tmp_path / name for name in ('slow.pdf', 'other.pdf', 'copy.pdf'))
+    slow.write_bytes(b'slow')
+    other.write_bytes(b'other')
+    copy.write_bytes(b'slow')
+
+    supervisor = Supervisor(1)
+    supervisor.attempted.add(str(slow))
+    supervisor.failures.append({'file': slow.name, 'path': str(slow), 'digest': 'd1', 'reason': 'timeout'})
+    supervisor.save_report(report)
+    assert set(load_quarantine(report)) == {'d1'}
+
+    # 另一次运行没有处理slow.pdf，其记录保留；重新处理成功的other.pdf不在报告中
+    supervisor = Supervisor(1)
+    supervisor.attempted.add(str(other))
+    supervisor.save_report(report)
+    with open(report, 'r', encoding='utf-8') as f:
+        assert [failure['file'] for failure in json.load(f)] == ['slow.pdf']
+
+    with open(report, 'w', encoding='utf-8') as f:
+        json.dump([{'file': slow.name, 'path': str(slow), 'digest': content_hash(slow)}], f)
+    # 字节相同的副本也被跳过，其余文件按原顺序处理
+    results = list(skip_quarantined([slow, other, copy], lambda items: [item.name for item in items],
+                                    lambda: None, report))
+    assert results == [None, 'other.pdf', None]
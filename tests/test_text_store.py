@@ -0,0 +1,67 @@
+from extract_cache import ExtractCache
+from pdf_text import TEXT_VERSION, PdfTextStore, content_fingerprint, input_fingerprint
+from task1_1 import extract_nutrition_data
+
+
+def make_store(tmp_path, documents):
+    """
+    建立使用临时缓存的文本库，documents为{文件名: 每页内容}，每页内容直接写入缓存（不解析PDF）
+    """
+    store = PdfTextStore(ExtractCache(str(tmp_path / 'cache.sqlite')))
+    paths = []
+    for name, pages in documents.items():
+        path = tmp_path / name
+        # 文件内容不同，内容哈希不同
+        path.write_bytes(name.encode('utf-8'))
+        store.cache.put_pages(store.content_hash(path), TEXT_VERSION, name, {'pages': pages, 'complete': True})
+        paths.append(path)
+    return store, paths
+
+
+def text_page(table):
+    return {'text': f"营养成分表\n营养成分 每100g 每100kJ\n{table}\n【配料表】水", 'words': []}
+
+
+def coords_page(value_x):
+    words = [
+        ['营养成分表', 10, 80, 60, 90],
+        ['营养成分', 10, 100, 50, 110], ['每100g', 100, 100, 140, 110], ['每100kJ', 200, 100, 240, 110],
+        ['钠', 10, 120, 20, 130], ['5', value_x, 120, value_x + 6, 130],
+        ['【配料表】', 10, 140, 60, 150]
+    ]
+    return {'text': '营养成分表\n营养成分 每100g 每100kJ\n钠 5\n【配料表】', 'words': words}
+
+
+def test_identical_input_reuses_parse_result(tmp_path):
+    store, paths = make_store(tmp_path, {'a.pdf': [text_page('钠 10 5')], 'b.pdf': [text_page('钠 10 5')]})
+    results = [extract_nutrition_data(path, store) for path in paths]
+    assert results[0]['钠(mg)'] == results[1]['钠(mg)'] == 5.0
+    assert store.dedup_stats()['content_duplicates'] == 1
+
+
+def test_text_layout_difference_is_not_deduplicated(tmp_path):
+    store, paths = make_store(tmp_path, {'a.pdf': [text_page('钠 10 5\n钾 20 8')],
+                                         'b.pdf': [text_page('钠 10\n5 钾 20 8')]})
+    first, second = (extract_nutrition_data(path, store) for path in paths)
+    assert (first['钠(mg)'], first['钾(mg)']) == (5.0, 8.0)
+    assert (second['钠(mg)'], second['钾(mg)']) == (0, 0)
+    stats = store.dedup_stats()
+    assert stats['content_duplicates'] == 0
+    assert stats['near_duplicates'] == 1
+
+
+def test_coordinate_difference_is_not_deduplicated(tmp_path):
+    # 文字相同，数值分别位于每100kJ列和每100g列
+    store, paths = make_store(tmp_path, {'a.pdf': [coords_page(210)], 'b.pdf': [coords_page(110)]})
+    first, second = (extract_nutrition_data(path, store, table_mode='coords') for path in paths)
+    assert first['钠(mg)'] == 5.0
+    assert second['钠(mg)'] == 0
+    assert store.dedup_stats()['content_duplicates'] == 0
+
+
+def test_fingerprints():
+    pages = [{'text': '能量 100　kJ', 'words': [['能量', 1, 2, 3, 4]]}]
+    moved = [{'text': '能量  100 kJ', 'words': [['能量', 9, 9, 9, 9]]}]
+    assert content_fingerprint(pages) == content_fingerprint(moved) == content_fingerprint('能量 100 kJ\n')
+    assert input_fingerprint(pages) != input_fingerprint(moved)
+    assert input_fingerprint('钠 10 5\n钾') != input_fingerprint('钠 10\n5 钾')
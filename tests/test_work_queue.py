@@ -0,0 +1,80 @@
+import json
+import os
+import time
+import pytest
+from work_queue import WorkQueue
+
+
+def make_queue(tmp_path, worker_id, items=('a', 'b', 'c'), **kwargs):
+    return WorkQueue('task', list(items), config=['v1'], directory=tmp_path, worker_id=worker_id, **kwargs)
+
+
+def expire(queue, key, seconds):
+    # 把租约文件的修改时间调到seconds秒前，模拟持有者已停止刷新
+    path = queue._claim_path(key)
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_claim_is_exclusive_until_released(tmp_path):
+    first = make_queue(tmp_path, 'w1')
+    second = make_queue(tmp_path, 'w2')
+    assert first.claim('a')
+    assert not second.claim('a')
+
+    # 只有持有者能释放认领
+    second.release('a')
+    assert not second.claim('a')
+    first.release('a')
+    assert second.claim('a')
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    first = make_queue(tmp_path, 'w1', lease_seconds=60)
+    second = make_queue(tmp_path, 'w2', lease_seconds=60)
+    assert first.claim('a')
+
+    expire(first, 'a', 30)
+    assert not second.claim('a')
+
+    expire(first, 'a', 120)
+    assert second.claim('a')
+    with open(second._claim_path('a'), 'r', encoding='utf-8') as f:
+        assert json.load(f)['worker'] == 'w2'
+    # 原持有者恢复后不能释放已被接管的认领
+    first.release('a')
+    assert second._claim_path('a').exists()
+    assert list(tmp_path.glob('task/claims/*.stale')) == []
+
+
+def test_work_skips_claimed_items_and_merges_in_order(tmp_path):
+    first = make_queue(tmp_path, 'w1')
+    second = make_queue(tmp_path, 'w2')
+    assert first.claim('b')
+
+    assert second.work(str.upper) == 2
+    assert second.remaining() == ['b']
+    with pytest.raises(ValueError):
+        second.records()
+
+    first.release('b')
+    assert first.work(str.upper) == 1
+    assert first.remaining() == []
+    assert first.records() == ['A', 'B', 'C']
+    assert len(list(tmp_path.glob('task/parts/*.jsonl'))) == 2
+
+
+def test_records_ignore_truncated_part_lines(tmp_path):
+    queue = make_queue(tmp_path, 'w1')
+    queue.work(str.upper)
+    with open(queue.parts_dir / 'w9.jsonl', 'w', encoding='utf-8') as f:
+        f.write('{"key": "a", "rec')
+    assert queue.records() == ['A', 'B', 'C']
+
+
+def test_plan_mismatch_is_rejected(tmp_path):
+    make_queue(tmp_path, 'w1')
+    with pytest.raises(ValueError):
+        make_queue(tmp_path, 'w2', items=('a', 'b'))
+    make_queue(tmp_path, 'w1').clear()
+    make_queue(tmp_path, 'w2', items=('a', 'b'))
@@ -0,0 +1,135 @@
+import argparse
+import os
+import time
+from pathlib import Path
+from manifest import diff_fingerprints
+from pipeline import Pipeline, default_stages, pdf_sources
+
+# 监视的输入：PDF目录和data.xlsx
+BOOKS_DIR = 'DATA/books'
+DATA_PATH = 'DATA/data.xlsx'
+
+
+def snapshot(books_dir=BOOKS_DIR, data_path=DATA_PATH):
+    """
+    输入文件的快照：{文件名: (大小, 修改时间)}，只读取目录和文件的元数据
+    """
+    files = {}
+    try:
+        with os.scandir(books_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.pdf') and entry.is_file():
+                    stat = entry.stat()
+                    files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    except FileNotFoundError:
+        pass
+    if os.path.exists(data_path):
+        stat = os.stat(data_path)
+        files[Path(data_path).name] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+class PollingWatcher:
+    """
+    轮询输入文件的元数据，发现变化后等待变化停止（连续debounce秒没有新的变化，
+    如一次复制多个PDF、文件还在写入时）再返回，一批变化只触发一次处理
+    """
+
+    def __init__(self, interval=1.0, debounce=3.0, books_dir=BOOKS_DIR, data_path=DATA_PATH):
+        """
+        参数：
+            interval: 轮询间隔（秒）
+            debounce: 最后一次变化后等待多久没有新的变化才开始处理（秒）
+        """
+        self.interval = interval
+        self.debounce = debounce
+        self.books_dir = books_dir
+        self.data_path = data_path
+        self.current = self._snapshot()
+
+    def _snapshot(self):
+        return snapshot(self.books_dir, self.data_path)
+
+    def wait(self):
+        """
+        阻塞直到输入文件变化并稳定下来，返回变化（格式同manifest.diff_fingerprints）
+        """
+        latest = self.current
+        while latest == self.current:
+            time.sleep(self.interval)
+            latest = self._snapshot()
+
+        quiet_since = time.monotonic()
+        while time.monotonic() - quiet_since < self.debounce:
+            time.sleep(min(self.interval, self.debounce))
+            newer = self._snapshot()
+            if newer != latest:
+                latest = newer
+                quiet_since = time.monotonic()
+
+        # 处理期间发生的变化会在下一次wait中发现
+        changes = diff_fingerprints(self.current, latest)
+        self.current = latest
+        return changes
+
+
+def print_input_changes(changes, limit=5):
+    for kind, label in (('added', '新增'), ('modified', '修改'), ('removed', '删除')):
+        names = changes[kind]
+        if names:
+            print(f"{label}{len(names)}个: {'、'.join(names[:limit])}{' 等' if len(names) > limit else ''}")
+
+
+def run_pipeline(targets=None, workers=1):
+    """
+    执行一次流水线：task1_1、task1_2通过提取缓存只解析内容变化的PDF，
+    输入指纹未变化的阶段（如只修改了data.xlsx时的task1_1和task2_4）直接跳过
+    """
+    # PDF指纹在同一进程中有缓存，每次执行前清除
+    pdf_sources.cache_clear()
+    try:
+        return Pipeline(default_stages(workers)).run(targets)
+    except Exception as e:
+        print(f"执行流水线出错: {type(e).__name__}: {str(e)}")
+        return None
+
+
+def watch(targets=None, workers=1, interval=1.0, debounce=3.0, initial_run=True):
+    """
+    监视DATA/books和data.xlsx，变化后重新执行流水线，直到按Ctrl+C退出
+    参数：
+        targets: 只执行这些阶段（连同其上游阶段），None表示全部阶段
+        workers: task1_1、task1_2并行解析PDF的进程数
+        interval, debounce: 见PollingWatcher
+        initial_run: 启动时先执行一次，使结果与当前的输入一致
+    """
+    watcher = PollingWatcher(interval, debounce)
+    if initial_run:
+        run_pipeline(targets, workers)
+    try:
+        while True:
+            print(f"\n监视{BOOKS_DIR}和{DATA_PATH}的变化（每{interval}秒检查一次，按Ctrl+C退出）...")
+            changes = watcher.wait()
+            print(f"\n[{time.strftime('%H:%M:%S')}] 输入文件发生变化")
+            print_input_changes(changes)
+            start = time.perf_counter()
+            run_pipeline(targets, workers)
+            print(f"本次处理耗时{time.perf_counter() - start:.1f}秒")
+    except KeyboardInterrupt:
+        print("\n停止监视")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='监视DATA/books和data.xlsx，变化后重新执行流水线')
+    parser.add_argument('targets', nargs='*',
+                        help='只执行这些阶段（连同其上游阶段），如task1_4；默认执行全部阶段')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='task1_1、task1_2并行解析PDF的进程数，0表示使用全部CPU核心（默认1）')
+    parser.add_argument('--interval', type=float, default=1.0, help='轮询间隔（秒，默认1）')
+    parser.add_argument('--debounce', type=float, default=3.0,
+                        help='最后一次变化后等待多久没有新的变化才开始处理（秒，默认3）')
+    parser.add_argument('--no-initial-run', action='store_true', help='启动时不先执行一次流水线')
+    args = parser.parse_args()
+
+    watch(args.targets or None, workers=args.workers, interval=args.interval, debounce=args.debounce,
+          initial_run=not args.no_initial_run)
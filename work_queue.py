@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# 工作队列的保存位置（多台机器运行时应位于共享文件系统上）
+QUEUE_DIR = 'result/queue'
+
+
+class WorkQueue:
+    """
+    无协调者的工作队列：多个工作进程（可以在不同机器上，共享同一个目录）各自认领项目并处理。
+    认领通过原子创建租约文件（O_CREAT|O_EXCL）完成，处理期间定期刷新租约文件的修改时间；
+    工作进程退出或崩溃后租约不再刷新，超过租约时间后其他工作进程可以接管该项目。
+    每个工作进程的结果写入自己的部分结果文件，全部完成后由合并步骤按原顺序读出
+    """
+
+    def __init__(self, name, items, key=str, config=None, lease_seconds=600, directory=QUEUE_DIR,
+                 worker_id=None):
+        """
+        参数：
+            name: 任务名（如'task1_1'），每个任务的队列保存在单独的目录中
+            items: 待处理的项目列表（如PDF路径），所有工作进程必须相同
+            key: 项目的标识函数，返回值用作租约文件名
+            config: 影响结果的其他参数（如解析方式），所有工作进程必须相同
+            lease_seconds: 租约时间（秒），超过这么久没有刷新的认领视为失效
+            worker_id: 工作进程的标识，默认为主机名-进程号
+        """
+        self.items = list(items)
+        self.key = key
+        self.lease_seconds = lease_seconds
+        self.directory = Path(directory) / name
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.claims_dir = self.directory / 'claims'
+        self.done_dir = self.directory / 'done'
+        self.parts_dir = self.directory / 'parts'
+        for path in (self.claims_dir, self.done_dir, self.parts_dir):
+            path.mkdir(parents=True, exist_ok=True)
+
+        digest = hashlib.sha256()
+        digest.update(json.dumps(config, ensure_ascii=False).encode('utf-8'))
+        for item in self.items:
+            digest.update(key(item).encode('utf-8'))
+            digest.update(b'\0')
+        self.plan = {'digest': digest.hexdigest(), 'items': len(self.items)}
+
+        # 第一个工作进程写入队列的计划，其他工作进程检查输入和参数是否一致
+        plan_path = self.directory / 'plan.json'
+        if plan_path.exists():
+            with open(plan_path, 'r', encoding='utf-8') as f:
+                if json.load(f) != self.plan:
+                    raise ValueError(f"队列 {self.directory} 的输入或参数与本次运行不同，"
+                                     f"请等待已有的任务完成，或删除该目录后重新开始")
+        else:
+            temp_path = plan_path.with_name(f"plan.{self.worker_id}.tmp")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.plan, f)
+            os.replace(temp_path, plan_path)
+
+    def _claim_path(self, key):
+        return self.claims_dir / f"{key}.lease"
+
+    def is_done(self, key):
+        return (self.done_dir / key).exists()
+
+    def claim(self, key):
+        """
+        尝试认领一个项目，成功返回True；项目已被其他工作进程认领（且租约未过期）时返回False
+        """
+        path = self._claim_path(key)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self._break_expired(path):
+                    return False
+                continue
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'worker': self.worker_id, 'claimed_at': time.time()}, f)
+            return True
+        return False
+
+    def _break_expired(self, path):
+        """
+        租约过期时接管：先把租约文件改名（改名是原子的，只有一个工作进程能成功），再删除
+        """
+        try:
+            if time.time() - path.stat().st_mtime <= self.lease_seconds:
+                return False
+            stale_path = path.with_name(f"{path.name}.{self.worker_id}.stale")
+            os.rename(path, stale_path)
+        except FileNotFoundError:
+            # 租约已被释放或已被其他工作进程接管，重新尝试认领
+            return True
+        print(f"接管过期的认领: {path.stem}")
+        stale_path.unlink()
+        return True
+
+    def release(self, key):
+        """
+        释放自己持有的认领
+        """
+        path = self._claim_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                owner = json.load(f).get('worker')
+        except (OSError, ValueError):
+            return
+        if owner == self.worker_id:
+            path.unlink(missing_ok=True)
+
+    @contextmanager
+    def _heartbeat(self, key):
+        """
+        处理期间每隔租约时间的三分之一刷新一次租约文件的修改时间
+        """
+        stopped = threading.Event()
+
+        def renew():
+            while not stopped.wait(self.lease_seconds / 3):
+                try:
+                    os.utime(self._claim_path(key))
+                except OSError:
+                    pass
+
+        thread = threading.Thread(target=renew, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stopped.set()
+            thread.join()
+
+    def _save_result(self, key, record):
+        """
+        先把结果追加到本工作进程的部分结果文件，再创建完成标记
+        """
+        part_path = self.parts_dir / f"{self.worker_id}.jsonl"
+        with open(part_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'key': key, 'record': record}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self.done_dir / key, 'w', encoding='utf-8') as f:
+            f.write(self.worker_id)
+
+    def work(self, process):
+        """
+        认领并处理未完成的项目，直到没有可以认领的项目为止
+        参数：
+            process: 处理函数，参数为一个项目，返回结果（可JSON序列化）
+        返回：
+            本工作进程处理的项目数
+        """
+        count = 0
+        while True:
+            claimed = False
+            for item in self.items:
+                key = self.key(item)
+                if self.is_done(key) or not self.claim(key):
+                    continue
+                claimed = True
+                try:
+                    # 认领前的检查与认领之间，项目可能刚被其他工作进程完成
+                    if self.is_done(key):
+                        continue
+                    with self._heartbeat(key):
+                        record = process(item)
+                    self._save_result(key, record)
+                    count += 1
+                    print(f"[{self.worker_id}] 已完成: {key}（本进程第{count}个）")
+                finally:
+                    self.release(key)
+            if not claimed:
+                break
+
+        remaining = self.remaining()
+        if remaining:
+            print(f"其余{len(remaining)}个项目正由其他工作进程处理"
+                  f"（认领超过{self.lease_seconds}秒未刷新时可重新运行工作进程接管）")
+        return count
+
+    def remaining(self):
+        """
+        还没有完成的项目列表
+        """
+        return [item for item in self.items if not self.is_done(self.key(item))]
+
+    def records(self):
+        """
+        合并所有工作进程的部分结果，按原顺序返回每个项目的结果（需全部完成）
+        """
+        results = {}
+        for part_path in sorted(self.parts_dir.glob('*.jsonl')):
+            with open(part_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 工作进程写入时崩溃留下的不完整行，该项目没有完成标记，会被重新处理
+                        continue
+                    results.setdefault(entry['key'], entry['record'])
+
+        missing = [self.key(item) for item in self.items if self.key(item) not in results]
+        if missing:
+            raise ValueError(f"以下项目没有结果: {', '.join(missing[:5])}"
+                             f"{' 等' if len(missing) > 5 else ''}")
+        return [results[self.key(item)] for item in self.items]
+
+    def clear(self):
+        """
+        合并结果保存后删除队列
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)